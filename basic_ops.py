@@ -1,8 +1,18 @@
 from PIL import Image, ImageFilter, ImageOps, ImageEnhance
 import numpy as np
 
+from convolution_engine import convolve2d
+from fft_utils import full_magnitude
+from geometry import transform_image
+from gradient import get_gradient
+from lut import apply_ops, arithmetic_op, boolean_not_op, negative_op, threshold_op
+
 # Membuat citra negatif
+# (mode 8-bit memakai tabel 256 entri lewat Image.point, lihat lut.py)
 def negative(img: Image.Image) -> Image.Image:
+    return apply_ops(img, [negative_op(fallback=_negative_array)])
+
+def _negative_array(img):
     arr = np.array(img)
     arr = 255 - arr
     return Image.fromarray(arr.astype(np.uint8))
@@ -11,9 +21,13 @@ def negative(img: Image.Image) -> Image.Image:
 def grayscale(img: Image.Image) -> Image.Image:
     return img.convert("L")
 
-# Operasi aritmatika pada citra (add, sub, mul, div)
+# Operasi aritmatika pada citra (add, sub, mul, div), hasil di-clip ke 0-255
 def arithmetic(img: Image.Image, op="add", value=50) -> Image.Image:
-    arr = np.array(img, dtype=np.int16)
+    return apply_ops(img, [arithmetic_op(op, value, fallback=lambda im: _arithmetic_array(im, op, value))])
+
+# Jalur array untuk mode di luar lut.LUT_MODES (int64 agar "mul" tidak overflow)
+def _arithmetic_array(img, op, value):
+    arr = np.array(img, dtype=np.int64)
     if op == "add":
         arr = arr + value
     elif op == "sub":
@@ -27,9 +41,7 @@ def arithmetic(img: Image.Image, op="add", value=50) -> Image.Image:
 
 # Operasi NOT (invers) pada citra
 def boolean_not(img: Image.Image) -> Image.Image:
-    arr = np.array(img.convert("L"))
-    arr = 255 - arr
-    return Image.fromarray(arr.astype(np.uint8))
+    return apply_ops(img, [boolean_not_op()])
 
 # Operasi logika AND dua citra
 def boolean_and(img1: Image.Image, img2: Image.Image) -> Image.Image:
@@ -50,33 +62,35 @@ def boolean_xor(img1: Image.Image, img2: Image.Image) -> Image.Image:
     return Image.fromarray(np.bitwise_xor(a1, a2).astype(np.uint8))
 
 # Translasi (geser) citra
+# Operasi geometrik dijalankan lewat geometry.transform_image: jika img hasil operasi geometrik
+# sebelumnya, transformasinya digabung sehingga citra sumber hanya di-resample sekali.
 def translation(img: Image.Image, tx=50, ty=50) -> Image.Image:
-    return img.transform(img.size, Image.AFFINE, (1, 0, tx, 0, 1, ty))
+    return transform_image(img, lambda aff: aff.translate(tx, ty))
 
-# Rotasi citra
+# Rotasi citra (kelipatan 90° memakai transpose, tanpa interpolasi)
 def rotation(img: Image.Image, angle=45) -> Image.Image:
-    return img.rotate(angle, expand=True)
+    return transform_image(img, lambda aff: aff.rotate(angle))
 
 # Zoom (resize) citra dengan faktor
 def zooming(img: Image.Image, factor=1.2) -> Image.Image:
-    w, h = img.size
-    return img.resize((int(w * factor), int(h * factor)))
+    return transform_image(img, lambda aff: aff.zoom(factor))
 
 # Flip citra horizontal/vertical
 def flipping(img: Image.Image, mode="horizontal") -> Image.Image:
-    if mode == "horizontal":
-        return img.transpose(Image.FLIP_LEFT_RIGHT)
-    else:
-        return img.transpose(Image.FLIP_TOP_BOTTOM)
+    return transform_image(img, lambda aff: aff.flip(mode))
 
 # Crop (potong) bagian citra
 def cropping(img: Image.Image, box=(50, 50, 200, 200)) -> Image.Image:
-    return img.crop(box)
+    return transform_image(img, lambda aff: aff.crop(box))
+
+# Hasil operasi geometrik bergantung pada citra sumber yang diingat geometry.py, bukan hanya
+# pada citra masukan, jadi history.OperationLogHistory selalu menyimpannya sebagai checkpoint
+for _func in (translation, rotation, zooming, flipping, cropping):
+    _func.replayable = False
 
 # Thresholding biner sederhana
 def threshold(img: Image.Image, t=128) -> Image.Image:
-    gray = img.convert("L")
-    return gray.point(lambda p: 255 if p > t else 0)
+    return apply_ops(img, [threshold_op(t)])
 
 # Mengubah citra ke mode biner
 def to_binary(img: Image.Image) -> Image.Image:
@@ -134,7 +148,9 @@ def pseudo_color(img: Image.Image) -> Image.Image:
     return Image.fromarray(pseudo)
 
 # Convolution manual untuk grayscale/RGB
-def convolution(img: Image.Image, kernel=None) -> Image.Image:
+# kernel bisa berupa array 2D atau tuple (kolom, baris) untuk kernel separable
+# method: "direct", "fft" atau "auto" (FFT dipilih otomatis untuk kernel besar)
+def convolution(img: Image.Image, kernel=None, method="auto") -> Image.Image:
     if kernel is None:
         kernel = np.array([
             [0, -1, 0],
@@ -142,21 +158,12 @@ def convolution(img: Image.Image, kernel=None) -> Image.Image:
             [0, -1, 0]
         ], dtype=np.float32)
 
-    arr = np.array(img).astype(np.float32)
+    # Array uint8 dipakai langsung: kernel bertap bulat diakumulasi sebagai integer
+    arr = np.array(img)
     if arr.ndim == 2:
         arr = arr[:, :, None]
 
-    h, w, c = arr.shape
-    kh, kw = kernel.shape
-    pad_h, pad_w = kh // 2, kw // 2
-    padded = np.pad(arr, ((pad_h, pad_h), (pad_w, pad_w), (0, 0)), mode="edge")
-    out = np.zeros_like(arr)
-
-    for y in range(h):
-        for x in range(w):
-            for ch in range(c):
-                region = padded[y:y + kh, x:x + kw, ch]
-                out[y, x, ch] = np.sum(region * kernel)
+    out = convolve2d(arr, kernel, method=method)
 
     out = np.clip(out, 0, 255).astype(np.uint8)
 
@@ -173,40 +180,10 @@ def sharpen_image(img: Image.Image, intensity=1):
     enhancer = ImageEnhance.Sharpness(img)
     return enhancer.enhance(1 + intensity)
 
-# Deteksi tepi dengan Sobel dan threshold
+# Deteksi tepi dengan Sobel dan threshold.
+# Gradien Sobel di-cache per citra, jadi menggeser slider threshold hanya melakukan perbandingan.
 def edge_detect_image(img: Image.Image, threshold_val=100):
-    gray = np.array(img.convert("L"), dtype=np.float32)
-
-    Kx = np.array([
-        [-1, 0, 1],
-        [-2, 0, 2],
-        [-1, 0, 1]
-    ], dtype=np.float32)
-
-    Ky = np.array([
-        [-1, -2, -1],
-        [ 0,  0,  0],
-        [ 1,  2,  1]
-    ], dtype=np.float32)
-
-    def convolve(img_arr, kernel):
-        kh, kw = kernel.shape
-        pad_h, pad_w = kh // 2, kw // 2
-        padded = np.pad(img_arr, ((pad_h, pad_h), (pad_w, pad_w)), mode='edge')
-        h, w = img_arr.shape
-        output = np.zeros_like(img_arr)
-        for i in range(h):
-            for j in range(w):
-                region = padded[i:i + kh, j:j + kw]
-                output[i, j] = np.sum(region * kernel)
-        return output
-
-    Gx = convolve(gray, Kx)
-    Gy = convolve(gray, Ky)
-    G = np.sqrt(Gx ** 2 + Gy ** 2)
-    G = np.clip(G, 0, 255)
-    G = (G > threshold_val) * 255
-    return Image.fromarray(G.astype(np.uint8))
+    return Image.fromarray(get_gradient(img, "sobel").threshold(threshold_val))
 
 # Fourier transform dengan pewarnaan kanal RGB
 def fourier_transform(img: Image.Image) -> Image.Image:
@@ -219,10 +196,11 @@ def fourier_transform(img: Image.Image) -> Image.Image:
     G_ratio = G / total
     B_ratio = B / total
 
+    # rfft2: input real cukup setengah spektrum, sisanya dari simetri Hermitian
     gray = arr.mean(axis=2)
-    f = np.fft.fft2(gray)
-    fshift = np.fft.fftshift(f)
-    magnitude = np.log1p(np.abs(fshift))
+    f = np.fft.rfft2(gray)
+    fshift = np.fft.fftshift(full_magnitude(f, gray.shape[1]))
+    magnitude = np.log1p(fshift)
     magnitude = 255 * (magnitude - magnitude.min()) / (magnitude.max() - magnitude.min())
 
     out = np.zeros_like(arr, dtype=np.uint8)
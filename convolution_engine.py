@@ -0,0 +1,206 @@
+import time
+from functools import partial
+
+import numpy as np
+
+import parallel
+from fft_utils import fast_shape
+
+# Koefisien biaya hasil pengukuran (detik per tap-piksel dan per piksel*log2 piksel),
+# diisi sekali saat mode "auto" pertama kali dipakai
+_cost_model = None
+
+# Padding tepi (mode "edge") sesuai ukuran kernel, untuk array 2D atau 3D (H, W, C)
+def pad_edge(arr, kh, kw):
+    pad_h, pad_w = kh // 2, kw // 2
+    pad = ((pad_h, pad_h), (pad_w, pad_w)) + ((0, 0),) * (arr.ndim - 2)
+    return np.pad(arr, pad, mode="edge")
+
+# Convolution pada array yang sudah di-padding.
+# Setiap tap kernel dijumlahkan sebagai satu slice bergeser dari seluruh array,
+# sehingga loop Python hanya sebanyak jumlah tap (kh * kw), bukan jumlah piksel.
+# dtype menentukan akumulator (float32, atau int16/int32 untuk jalur integer).
+def convolve_padded(padded, kernel, out_shape, dtype=np.float32):
+    h, w = out_shape[:2]
+    kh, kw = kernel.shape
+    integer = np.issubdtype(dtype, np.integer)
+    out = np.zeros((h, w) + padded.shape[2:], dtype=dtype)
+    tmp = None
+    for i in range(kh):
+        for j in range(kw):
+            k = int(kernel[i, j]) if integer else float(kernel[i, j])
+            if k == 0:
+                continue
+            src = padded[i:i + h, j:j + w]
+            if k == 1:
+                out += src
+            elif k == -1:
+                out -= src
+            else:
+                if tmp is None:
+                    tmp = np.empty_like(out)
+                np.multiply(src, k, out=tmp, dtype=dtype)
+                out += tmp
+    return out
+
+# Memilih akumulator: integer (int16/int32) untuk input uint8 dengan kernel bertap bulat,
+# float32 jika ada tap pecahan. gain = batas penguatan kernel (jumlah |tap|).
+def accumulator_dtype(arr, kernel_taps, gain):
+    taps = np.asarray(kernel_taps, dtype=np.float64)
+    if arr.dtype != np.uint8 or not np.all(taps == np.round(taps)):
+        return np.dtype(np.float32)
+    if gain * 255 <= np.iinfo(np.int16).max:
+        return np.dtype(np.int16)
+    return np.dtype(np.int32)
+
+# Memecah kernel rank-1 menjadi pasangan (kolom, baris) sehingga kernel = outer(kolom, baris).
+# Mengembalikan None jika kernel tidak separable.
+def separable_kernel(kernel, tol=1e-6):
+    kernel = np.asarray(kernel, dtype=np.float64)
+    if kernel.shape[0] < 2 or kernel.shape[1] < 2:
+        return None
+    r, c = np.unravel_index(np.argmax(np.abs(kernel)), kernel.shape)
+    pivot = kernel[r, c]
+    if pivot == 0:
+        return None
+    col = kernel[:, c] / pivot
+    row = kernel[r, :].copy()
+    if not np.allclose(np.outer(col, row), kernel, rtol=0, atol=tol * abs(pivot)):
+        return None
+    # Normalisasi agar faktor integer (Sobel/Prewitt) tetap integer
+    scale = np.min(np.abs(col[col != 0]))
+    return col / scale, row * scale
+
+# Convolution separable: satu pass vertikal (kolom) lalu satu pass horizontal (baris).
+# Biaya per piksel menjadi kh + kw tap, bukan kh * kw.
+def convolve_separable(arr, col, row, dtype=None):
+    col = np.asarray(col, dtype=np.float64).ravel()
+    row = np.asarray(row, dtype=np.float64).ravel()
+    if dtype is None:
+        gain = np.abs(col).sum() * np.abs(row).sum()
+        dtype = accumulator_dtype(arr, np.concatenate([col, row]), gain)
+    kh, kw = col.size, row.size
+    padded = pad_edge(_as_input(arr, dtype), kh, kw)
+    h, w = arr.shape[:2]
+    tmp = convolve_padded(padded, col[:, None], (h, padded.shape[1]), dtype)
+    return convolve_padded(tmp, row[None, :], (h, w), dtype)
+
+# Input jalur integer tetap uint8 (tanpa salinan float); jalur float dikonversi ke dtype
+def _as_input(arr, dtype):
+    if np.issubdtype(dtype, np.integer):
+        return arr
+    return np.asarray(arr, dtype=dtype)
+
+# Convolution via perkalian di domain frekuensi (rfft2) untuk kernel besar.
+# Padding tepi sama dengan jalur spasial; ukuran FFT dibulatkan ke ukuran cepat
+# lalu hasilnya dipotong kembali ke ukuran asli.
+def convolve_fft(arr, kernel, dtype=None):
+    if dtype is None or np.issubdtype(dtype, np.integer):
+        dtype = np.float32
+    kernel = np.asarray(kernel, dtype=np.float64)
+    kh, kw = kernel.shape
+    padded = pad_edge(np.asarray(arr, dtype=dtype), kh, kw)
+    h, w = arr.shape[:2]
+    fh, fw = fast_shape(padded.shape[:2])
+
+    # Korelasi = konvolusi dengan kernel yang dibalik
+    flipped = kernel[::-1, ::-1].astype(dtype)
+    spec = np.fft.rfft2(padded, s=(fh, fw), axes=(0, 1))
+    kspec = np.fft.rfft2(flipped, s=(fh, fw))
+    if spec.ndim == 3:
+        kspec = kspec[:, :, None]
+    spec *= kspec
+    full = np.fft.irfft2(spec, s=(fh, fw), axes=(0, 1))
+    return full[kh - 1:kh - 1 + h, kw - 1:kw - 1 + w].astype(dtype, copy=False)
+
+# Mengukur biaya convolution spasial dan FFT pada citra uji kecil
+def _measure_cost_model(size=512, repeat=3):
+    sample = np.random.default_rng(0).random((size, size), dtype=np.float32)
+    kernel = np.random.default_rng(1).random((5, 5))
+    n = sample.size
+
+    def best_time(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    padded = pad_edge(sample, 5, 5)
+    t_direct = best_time(lambda: convolve_padded(padded, kernel, sample.shape))
+    t_fft = best_time(lambda: convolve_fft(sample, kernel))
+    fh, fw = fast_shape(padded.shape)
+    return t_direct / (kernel.size * n), t_fft / (fh * fw * np.log2(fh * fw))
+
+# Memilih "direct" atau "fft" berdasarkan estimasi biaya dari model terukur
+def choose_method(shape, kernel):
+    global _cost_model
+    kernel = np.asarray(kernel, dtype=np.float64)
+    kh, kw = kernel.shape
+    # Kernel kecil (<= 5x5) selalu lebih cepat di domain spasial
+    if kernel.size <= 25:
+        return "direct"
+
+    if _cost_model is None:
+        _cost_model = _measure_cost_model()
+    c_direct, c_fft = _cost_model
+
+    factors = separable_kernel(kernel)
+    if factors is not None:
+        taps = np.count_nonzero(factors[0]) + np.count_nonzero(factors[1])
+    else:
+        taps = np.count_nonzero(kernel)
+    channels = shape[2] if len(shape) == 3 else 1
+    n = shape[0] * shape[1] * channels
+    fh, fw = fast_shape((shape[0] + 2 * (kh // 2), shape[1] + 2 * (kw // 2)))
+    nf = fh * fw
+    cost_direct = c_direct * taps * n
+    cost_fft = c_fft * nf * np.log2(nf) * channels
+    return "fft" if cost_fft < cost_direct else "direct"
+
+# Convolution 2D (korelasi, tanpa membalik kernel) dengan padding tepi.
+# Menerima array grayscale (H, W) atau berwarna (H, W, C); kernel diterapkan per channel.
+# Kernel boleh berupa tuple (kolom, baris) untuk memaksa jalur separable;
+# kernel 2D yang rank-1 otomatis dijalankan lewat jalur separable.
+# method: "direct" (spasial), "fft" (domain frekuensi) atau "auto" (dipilih dari biaya terukur)
+# dtype=None: input uint8 dengan kernel bertap bulat diakumulasi sebagai integer
+# (int16/int32) langsung dari array uint8; selain itu float32.
+# Jalur spasial pada citra besar dibagi per strip dan dijalankan paralel (lihat parallel.py).
+def convolve2d(arr, kernel, dtype=None, method="auto"):
+    if method not in ("direct", "fft", "auto"):
+        raise ValueError("method harus 'direct', 'fft' atau 'auto'")
+
+    if isinstance(kernel, tuple):
+        if method != "fft":
+            return _convolve_direct(arr, kernel, dtype)
+        kernel = np.outer(kernel[0], kernel[1])
+
+    kernel = np.asarray(kernel, dtype=np.float64)
+    if method == "auto":
+        method = choose_method(arr.shape, kernel)
+    if method == "fft":
+        return convolve_fft(arr, kernel, dtype)
+    return _convolve_direct(arr, kernel, dtype)
+
+# Jalur spasial: paralel per strip horizontal jika citra cukup besar
+def _convolve_direct(arr, kernel, dtype):
+    if parallel.should_parallelize(arr.shape):
+        halo = len(kernel[0]) // 2 if isinstance(kernel, tuple) else kernel.shape[0] // 2
+        func = partial(_convolve_direct_serial, kernel=kernel, dtype=dtype)
+        return parallel.run_strips(func, arr, halo)
+    return _convolve_direct_serial(arr, kernel, dtype)
+
+def _convolve_direct_serial(arr, kernel, dtype=None):
+    if isinstance(kernel, tuple):
+        return convolve_separable(arr, kernel[0], kernel[1], dtype)
+
+    factors = separable_kernel(kernel)
+    if factors is not None:
+        return convolve_separable(arr, factors[0], factors[1], dtype)
+
+    if dtype is None:
+        dtype = accumulator_dtype(arr, kernel, np.abs(kernel).sum())
+    kh, kw = kernel.shape
+    padded = pad_edge(_as_input(arr, dtype), kh, kw)
+    return convolve_padded(padded, kernel, arr.shape, dtype)
@@ -0,0 +1,336 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from history import format_bytes
+from result_cache import arg_key, call_key
+
+# Folder cache default (bisa diganti dengan environment variable PCD_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.environ.get(
+    "PCD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pcd-gui")
+)
+
+# Batas ukuran cache di disk (byte); entri yang paling lama tidak dipakai dibuang lebih dulu
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Mode yang disimpan sebagai .npy mentah; mode lain disimpan sebagai PNG
+NPY_MODES = ("1", "L", "LA", "RGB", "RGBA", "I", "F")
+
+# Versi format kunci dan file cache; naikkan jika cara menyimpan hasil atau menyusun kunci berubah
+CACHE_FORMAT_VERSION = 1
+
+# Versi implementasi tiap modul operasi (CACHEABLE_MODULES), ikut di-hash ke dalam kunci.
+# Naikkan versi modul yang hasilnya berubah, termasuk lewat helper yang dipakainya
+# (convolution_engine, gradient, fft_utils, lut, geometry, ...), agar hasil lama di disk tidak dipakai.
+MODULE_VERSIONS = {
+    "basic_ops": 1,
+    "edge_detection": 1,
+    "enhancement": 1,
+    "segmentation": 1,
+    "noise": 1,
+}
+
+_INDEX_FILE = "index.json"
+
+# Nama file hasil (kunci blake2b + ekstensi) dan file sementara (tempfile.mkstemp)
+_RESULT_FILE = re.compile(r"[0-9a-f]{32}\.(npy|png)")
+_TMP_FILE = re.compile(r"tmp\w+\.tmp")
+
+# Umur (detik) file .tmp yang dianggap sisa penulisan yang terputus
+_STALE_TMP_AGE = 3600
+
+# Jeda (detik) sebelum index disimpan setelah cache hit; hit beruntun cukup disimpan sekali
+_SAVE_DELAY = 2.0
+
+# Ukuran blok saat meng-hash file sumber
+_READ_BLOCK = 1024 * 1024
+
+
+# Digest isi file (blake2b), diingat per (path, ukuran, waktu modifikasi)
+_file_digests = {}
+
+def file_digest(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(memo_key)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_READ_BLOCK), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _file_digests[memo_key] = digest
+    return digest
+
+
+class DiskCache:
+    """
+    Cache hasil operasi di disk yang bertahan antar sesi. Kunci sebuah citra adalah "asal-usulnya":
+    citra yang dibuka dari file memakai digest file tersebut, dan hasil operasi memakai kunci
+    citra masukan + nama operasi + parameter. Jadi membuka file yang sama lalu menjalankan
+    operasi yang sama (juga berantai, mis. Sobel lalu threshold) langsung dibaca dari disk.
+    Citra tanpa asal-usul yang diketahui tidak di-cache di disk.
+    Index (index.json) menyimpan mode, ukuran file, durasi komputasi asli dan waktu akses
+    terakhir; ukuran total dibatasi max_bytes dengan pruning LRU.
+    max_bytes juga disimpan di index; tanpa max_bytes dipakai batas yang tersimpan
+    (mis. oleh aplikasi), atau DEFAULT_MAX_BYTES jika belum ada.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index, stored_max = self._load_index()
+        self.max_bytes = max_bytes if max_bytes is not None else (stored_max or DEFAULT_MAX_BYTES)
+        if self.max_bytes != stored_max:
+            with self._lock:
+                self._save_index()
+        # id(Image) -> (weakref, kunci asal-usul)
+        self._lineage = {}
+        # Penulisan file dikerjakan di background agar job tidak menunggu disk
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pcd-disk-cache")
+        self._save_timer = None
+
+    # Menandai img sebagai isi file path (dipanggil setelah open)
+    def register_source(self, img, path):
+        self.register(img, "file:" + file_digest(path))
+
+    # Mencatat kunci asal-usul img
+    def register(self, img, key):
+        if key is None:
+            return
+        img_id = id(img)
+        ref = weakref.ref(img, lambda _, i=img_id: self._lineage.pop(i, None))
+        with self._lock:
+            self._lineage[img_id] = (ref, key)
+
+    # Kunci asal-usul img, atau None jika tidak diketahui
+    def key_of(self, img):
+        with self._lock:
+            entry = self._lineage.get(id(img))
+        if entry is not None and entry[0]() is img:
+            return entry[1]
+        return None
+
+    # dst berisi citra yang sama dengan src (mis. hasil copy())
+    def alias(self, src, dst):
+        self.register(dst, self.key_of(src))
+
+    # Kunci cache disk untuk func(*args), atau None jika tidak bisa di-cache
+    # (operasi tidak boleh di-cache atau ada argumen Image tanpa asal-usul)
+    def make_key(self, func, args):
+        def to_key(value):
+            if isinstance(value, Image.Image):
+                lineage = self.key_of(value)
+                return None if lineage is None else ("lineage", lineage)
+            return arg_key(value)
+
+        key = call_key(func, args, to_key)
+        if key is None:
+            return None
+        # Kunci asal-usul hasil ini juga dipakai kunci operasi berikutnya, jadi versi modul
+        # ikut membatalkan hasil turunannya
+        versioned = (CACHE_FORMAT_VERSION, MODULE_VERSIONS.get(func.__module__, 0), key)
+        return hashlib.blake2b(repr(versioned).encode(), digest_size=16).hexdigest()
+
+    # Membaca hasil dari disk: (citra, durasi komputasi asli) atau None
+    def get(self, key):
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            entry["access"] = time.time()
+        self._schedule_save()
+        path = os.path.join(self.directory, entry["file"])
+        try:
+            # Dibaca penuh ke memori (bukan memory-map): file yang masih dipetakan tidak bisa
+            # dihapus di Windows, jadi prune() tidak bisa membuangnya
+            if entry["file"].endswith(".npy"):
+                img = Image.fromarray(np.load(path))
+            else:
+                img = Image.open(path)
+                img.load()
+        except (OSError, ValueError):
+            self._drop(key)
+            return None
+        if img.mode != entry["mode"]:
+            self._drop(key)
+            return None
+        return img, entry["elapsed"]
+
+    # Menyimpan hasil ke disk (di background); index disimpan dan cache dipangkas setelahnya
+    def put(self, key, img, elapsed):
+        if img.mode not in NPY_MODES and img.mode not in ("P", "I;16"):
+            return
+        self._writer.submit(self._write, key, img, elapsed)
+
+    def _write(self, key, img, elapsed):
+        if img.mode in NPY_MODES:
+            name, save = key + ".npy", lambda f: np.save(f, np.asarray(img))
+        else:
+            name, save = key + ".png", lambda f: img.save(f, "PNG")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                save(f)
+            os.replace(tmp, os.path.join(self.directory, name))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        with self._lock:
+            self._index[key] = {
+                "file": name,
+                "mode": img.mode,
+                "bytes": os.path.getsize(os.path.join(self.directory, name)),
+                "elapsed": elapsed,
+                "access": time.time(),
+            }
+        self.prune()
+
+    # Membuang entri yang paling lama tidak dipakai sampai total ukuran <= max_bytes.
+    # Entri yang file-nya gagal dihapus tetap di index (dicoba lagi nanti).
+    # Mengembalikan jumlah entri yang dibuang.
+    def prune(self, max_bytes=None):
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        with self._lock:
+            total = sum(e["bytes"] for e in self._index.values())
+            for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["access"]):
+                if total <= limit:
+                    break
+                if not self._remove_file(entry["file"]):
+                    continue
+                del self._index[key]
+                total -= entry["bytes"]
+                removed += 1
+            self._save_index()
+        return removed
+
+    # Menghapus seluruh isi cache
+    def clear(self):
+        return self.prune(0)
+
+    # Ringkasan isi cache
+    def info(self):
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "entries": len(self._index),
+                "bytes": sum(e["bytes"] for e in self._index.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    # Menunggu penulisan yang tertunda dan menyimpan index
+    def close(self):
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._save_index()
+
+    # Waktu akses yang diperbarui cache hit disimpan ke index setelah _SAVE_DELAY detik,
+    # agar pruning LRU di sesi berikutnya tidak membuang entri yang paling sering dipakai
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(_SAVE_DELAY, self._save_later)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_later(self):
+        with self._lock:
+            self._save_timer = None
+            self._save_index()
+
+    def _drop(self, key):
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and self._remove_file(entry["file"]):
+                del self._index[key]
+            self._save_index()
+
+    # True jika file sudah tidak ada
+    def _remove_file(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        return True
+
+    # Mengembalikan (entri index, max_bytes yang tersimpan atau None)
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, _INDEX_FILE), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        # Format lama: index berisi entri saja
+        if "entries" in data:
+            index, max_bytes = data["entries"], data.get("max_bytes")
+        else:
+            index, max_bytes = data, None
+        # Entri yang file-nya sudah tidak ada diabaikan
+        index = {
+            k: e for k, e in index.items()
+            if os.path.exists(os.path.join(self.directory, e.get("file", "")))
+        }
+        self._sweep(index)
+        return index, max_bytes
+
+    # Menghapus file hasil yang tidak tercatat di index (mis. gagal dihapus pada sesi sebelumnya)
+    # dan file sementara sisa penulisan yang terputus. Hanya nama file buatan cache yang disentuh.
+    def _sweep(self, index):
+        known = {e["file"] for e in index.values()}
+        stale = time.time() - _STALE_TMP_AGE
+        for name in os.listdir(self.directory):
+            if _RESULT_FILE.fullmatch(name):
+                if name not in known:
+                    self._remove_file(name)
+            elif _TMP_FILE.fullmatch(name):
+                try:
+                    if os.path.getmtime(os.path.join(self.directory, name)) < stale:
+                        self._remove_file(name)
+                except OSError:
+                    pass
+
+    # Index ditulis ke file sementara lalu di-rename agar tidak pernah setengah tertulis
+    def _save_index(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"format": CACHE_FORMAT_VERSION, "max_bytes": self.max_bytes, "entries": self._index}, f)
+        os.replace(tmp, os.path.join(self.directory, _INDEX_FILE))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Melihat atau mengosongkan cache hasil operasi di disk.")
+    parser.add_argument("command", choices=["info", "clear", "prune"])
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="folder cache")
+    parser.add_argument("--max-mb", type=float, default=None, help="batas ukuran untuk prune (MB); default: batas yang tersimpan di index")
+    args = parser.parse_args()
+
+    cache = DiskCache(args.dir)
+    if args.command == "clear":
+        print(f"Dihapus: {cache.clear()} entri")
+    elif args.command == "prune":
+        limit = None if args.max_mb is None else int(args.max_mb * 1024 * 1024)
+        print(f"Dihapus: {cache.prune(limit)} entri")
+    info = cache.info()
+    print(
+        f"{info['directory']}: {info['entries']} entri, "
+        f"{format_bytes(info['bytes'])} dari {format_bytes(info['max_bytes'])}"
+    )
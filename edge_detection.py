@@ -1,72 +1,59 @@
+from functools import partial
+
 import numpy as np
 from PIL import Image
 
-# Konversi gambar ke array grayscale (float)
+import parallel
+
+from convolution_engine import convolve2d, pad_edge
+from gradient import cached_for_image, compute_gradient, get_gradient, magnitude
+from scheduler import check_cancelled
+
+# Konversi gambar ke array grayscale uint8.
+# Kernel bertap bulat diakumulasi langsung sebagai int16/int32 oleh convolution_engine;
+# jalur float32 hanya dipakai untuk kernel dengan tap pecahan.
 def _to_gray(img):
     if img.mode != "L":
-        return np.array(img.convert("L"), dtype=np.float32)
-    return np.array(img, dtype=np.float32)
+        return np.asarray(img.convert("L"), dtype=np.uint8)
+    return np.asarray(img, dtype=np.uint8)
 
-# Konversi array grayscale ke objek Image
+# Konversi array grayscale ke objek Image (clip per blok baris, tanpa salinan float penuh)
 def _to_image(arr):
-    arr = np.clip(arr, 0, 255).astype(np.uint8)
-    return Image.fromarray(arr, "L")
+    out = np.empty(arr.shape, dtype=np.uint8)
+    for y in range(0, arr.shape[0], 512):
+        rows = slice(y, y + 512)
+        out[rows] = np.clip(arr[rows], 0, 255)
+    return Image.fromarray(out, "L")
 
 # Convolution 2D sederhana untuk array grayscale
 def _convolve(arr, kernel):
-    h, w = arr.shape
-    kh, kw = kernel.shape
-    pad_h, pad_w = kh // 2, kw // 2
-    padded = np.pad(arr, ((pad_h, pad_h), (pad_w, pad_w)), mode='edge')
-    out = np.zeros_like(arr)
-    for i in range(h):
-        for j in range(w):
-            out[i, j] = np.sum(padded[i:i+kh, j:j+kw] * kernel)
-    return out
-
-# Deteksi tepi dengan operator Sobel
+    return convolve2d(arr, kernel)
+
+# Deteksi tepi dengan operator Sobel (gradien diambil dari cache bersama)
 def sobel_edge(img):
-    arr = _to_gray(img)
-    Kx = np.array([[1, 0, -1],
-                   [2, 0, -2],
-                   [1, 0, -1]], float)
-    Ky = np.array([[1, 2, 1],
-                   [0, 0, 0],
-                   [-1, -2, -1]], float)
-    gx = _convolve(arr, Kx)
-    gy = _convolve(arr, Ky)
-    return _to_image(np.sqrt(gx**2 + gy**2))
+    return _to_image(get_gradient(img, "sobel").magnitude)
 
 # Deteksi tepi dengan operator Prewitt
 def prewitt_edge(img):
-    arr = _to_gray(img)
-    Kx = np.array([[1, 0, -1],
-                   [1, 0, -1],
-                   [1, 0, -1]], float)
-    Ky = np.array([[1, 1, 1],
-                   [0, 0, 0],
-                   [-1, -1, -1]], float)
-    gx = _convolve(arr, Kx)
-    gy = _convolve(arr, Ky)
-    return _to_image(np.sqrt(gx**2 + gy**2))
+    return _to_image(get_gradient(img, "prewitt").magnitude)
 
 # Deteksi tepi dengan operator Roberts
 def roberts_edge(img):
     arr = _to_gray(img)
     Kx = np.array([[1, 0],
-                   [0, -1]], float)
+                   [0, -1]])
     Ky = np.array([[0, 1],
-                   [-1, 0]], float)
+                   [-1, 0]])
     gx = _convolve(arr, Kx)
     gy = _convolve(arr, Ky)
-    return _to_image(np.sqrt(gx**2 + gy**2))
+    return _to_image(magnitude(gx, gy))
 
 # Deteksi tepi dengan operator Laplacian
 def laplacian_edge(img):
     arr = _to_gray(img)
     kernel = np.array([[0, 1, 0],
                        [1, -4, 1],
-                       [0, 1, 0]], float)
+                       [0, 1, 0]])
     return _to_image(np.abs(_convolve(arr, kernel)))
 
 # Deteksi tepi dengan LoG (Gaussian blur + Laplacian)
@@ -78,52 +65,160 @@ def log_edge(img):
     blurred = _convolve(arr, gauss)
     lap_kernel = np.array([[0, 1, 0],
                            [1, -4, 1],
-                           [0, 1, 0]], float)
+                           [0, 1, 0]])
     return _to_image(np.abs(_convolve(blurred, lap_kernel)))
 
-# Deteksi tepi ala Canny sederhana (pakai magnitude dan threshold)
+# Kernel Gaussian 1D ternormalisasi (dipakai sebagai pasangan separable)
+def _gaussian_1d(sigma=1.4, radius=2):
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    g = np.exp(-(x ** 2) / (2 * sigma ** 2))
+    return g / g.sum()
+
+# Non-maximum suppression tervektorisasi: arah gradien dikuantisasi ke 0/45/90/135 derajat
+# (tanpa arctan2, cukup membandingkan |gx| dan |gy| dengan tan(22.5))
+def _non_max_suppression(grad):
+    gx, gy = grad.gx, grad.gy
+    mag = grad.magnitude
+    h, w = mag.shape
+    padded = np.pad(mag, 1, mode="constant")
+
+    def neighbour(dy, dx):
+        return padded[1 + dy:1 + dy + h, 1 + dx:1 + dx + w]
+
+    ax, ay = np.abs(gx), np.abs(gy)
+    tan22 = np.float32(0.41421356)
+    horizontal = ay <= tan22 * ax
+    vertical = ax <= tan22 * ay
+    diagonal = ~(horizontal | vertical)
+    same_sign = (gx > 0) == (gy > 0)
+
+    keep = horizontal & (mag >= neighbour(0, -1)) & (mag >= neighbour(0, 1))
+    keep |= vertical & (mag >= neighbour(-1, 0)) & (mag >= neighbour(1, 0))
+    keep |= diagonal & same_sign & (mag >= neighbour(-1, -1)) & (mag >= neighbour(1, 1))
+    keep |= diagonal & ~same_sign & (mag >= neighbour(-1, 1)) & (mag >= neighbour(1, -1))
+    return np.where(keep, mag, np.float32(0))
+
+# Tahap Canny yang tidak bergantung pada threshold: Gaussian, gradien Sobel, NMS
+def _canny_nms(img):
+    smooth = convolve2d(_to_gray(img), (_gaussian_1d(), _gaussian_1d()))
+    return _non_max_suppression(compute_gradient(smooth, "sobel"))
+
+# Pelabelan komponen terhubung (8-tetangga) dengan union-find tervektorisasi:
+# hooking akar ke label terkecil lewat np.minimum.at lalu pointer jumping sampai stabil.
+# Mengembalikan (indeks piksel mask, label per piksel tersebut).
+def _label_components(mask):
+    h, w = mask.shape
+    idx = np.flatnonzero(mask)
+    n = idx.size
+    lookup = np.full(mask.size, -1, dtype=np.int64)
+    lookup[idx] = np.arange(n)
+    lookup = lookup.reshape(h, w)
+
+    edges_a, edges_b = [], []
+    for dy, dx in ((0, 1), (1, -1), (1, 0), (1, 1)):
+        ys = slice(0, h - dy)
+        yd = slice(dy, h)
+        xs = slice(max(-dx, 0), w - max(dx, 0))
+        xd = slice(max(dx, 0), w - max(-dx, 0))
+        both = mask[ys, xs] & mask[yd, xd]
+        edges_a.append(lookup[ys, xs][both])
+        edges_b.append(lookup[yd, xd][both])
+    a = np.concatenate(edges_a)
+    b = np.concatenate(edges_b)
+
+    parent = np.arange(n)
+    while True:
+        check_cancelled()
+        pa, pb = parent[a], parent[b]
+        differ = pa != pb
+        if not differ.any():
+            break
+        pa, pb = pa[differ], pb[differ]
+        np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+        a, b = a[differ], b[differ]
+    return idx, parent
+
+# Hysteresis: piksel lemah (>= low) dipertahankan jika satu komponen dengan piksel kuat (>= high)
+def _hysteresis(nms, low, high):
+    candidate = nms >= low
+    idx, labels = _label_components(candidate)
+    strong = nms.ravel()[idx] >= high
+    keep_label = np.zeros(labels.size, dtype=bool)
+    keep_label[labels[strong]] = True
+    edges = np.zeros(nms.size, dtype=np.uint8)
+    edges[idx[keep_label[labels]]] = 255
+    return edges.reshape(nms.shape)
+
+# Deteksi tepi Canny: Gaussian, gradien Sobel, non-maximum suppression dan hysteresis.
+# Hasil NMS di-cache per citra sehingga mengubah low/high hanya mengulang hysteresis.
 def canny_edge(img, low=50, high=150):
-    arr = _to_gray(img)
-    Kx = np.array([[1, 0, -1],
-                   [2, 0, -2],
-                   [1, 0, -1]], float)
-    Ky = np.array([[1, 2, 1],
-                   [0, 0, 0],
-                   [-1, -2, -1]], float)
-    gx = _convolve(arr, Kx)
-    gy = _convolve(arr, Ky)
-    mag = np.sqrt(gx**2 + gy**2)
-    edges = np.where((mag >= low) & (mag <= high), 255, 0)
-    return _to_image(edges)
+    nms = cached_for_image(img, "canny_nms", _canny_nms)
+    check_cancelled()
+    return _to_image(_hysteresis(nms, low, max(low, high)))
+
+# Posisi 8 tetangga (baris, kolom) pada jendela 3x3, searah jarum jam mulai kiri atas
+_KIRSCH_RING = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0)]
 
-# Deteksi tepi dengan operator Kirsch (kompas)
-def compass_edge(img):
+# Kernel Kirsch arah d: nilai 5 pada tiga tetangga berurutan mulai dari posisi ring d,
+# -3 pada lima tetangga lainnya (urutan arah: N, NE, E, SE, S, SW, W, NW)
+def _kirsch_kernel(d):
+    kernel = np.full((3, 3), -3)
+    kernel[1, 1] = 0
+    for k in range(3):
+        kernel[_KIRSCH_RING[(d + k) % 8]] = 5
+    return kernel
+
+KIRSCH_KERNELS = [_kirsch_kernel(d) for d in range(8)]
+
+# Respon Kirsch pada array uint8 (H, W): maksimum respon 8 arah dan indeks arah pemenang.
+# Respon arah d = 5 * S3_d - 3 * (S8 - S3_d) = 8 * S3_d - 3 * S8, dengan S3_d jumlah tiga
+# tetangga berurutan dan S8 jumlah delapan tetangga. Cukup satu padding dan jumlah bergulir
+# S3_d dengan maksimum berjalan, tanpa menyimpan 8 bidang respon.
+def _kirsch_response(arr, return_direction=False):
+    h, w = arr.shape
+    # Respon Kirsch pada input uint8 berada di rentang +-6120, cukup int16
+    padded = pad_edge(arr.astype(np.int16), 3, 3)
+    ring = [padded[i:i + h, j:j + w] for i, j in _KIRSCH_RING]
+
+    total = ring[0] + ring[1]
+    for r in ring[2:]:
+        total += r
+
+    s3 = ring[0] + ring[1] + ring[2]
+    best = s3.copy()
+    direction = np.zeros((h, w), dtype=np.uint8) if return_direction else None
+    for d in range(1, 8):
+        s3 -= ring[d - 1]
+        s3 += ring[(d + 2) % 8]
+        if return_direction:
+            better = s3 > best
+            direction[better] = d
+            np.copyto(best, s3, where=better)
+        else:
+            np.maximum(best, s3, out=best)
+
+    best *= 8
+    best -= 3 * total
+    if return_direction:
+        # Digabung dalam satu array agar bisa diproses per strip
+        return np.stack([best, direction.astype(np.int16)], axis=-1)
+    return best
+
+# Deteksi tepi dengan operator Kirsch (kompas), dijalankan paralel per strip untuk citra besar.
+# return_direction=True juga mengembalikan indeks arah pemenang (0-7) per piksel.
+def compass_edge(img, return_direction=False):
     arr = _to_gray(img)
-    kirsch_kernels = [
-        np.array([[5, 5, 5],
-                  [-3, 0, -3],
-                  [-3, -3, -3]]),
-        np.array([[5, 5, -3],
-                  [5, 0, -3],
-                  [-3, -3, -3]]),
-        np.array([[5, -3, -3],
-                  [5, 0, -3],
-                  [-3, -3, 5]]),
-        np.array([[-3, -3, -3],
-                  [5, 0, -3],
-                  [5, 5, -3]]),
-        np.array([[-3, -3, -3],
-                  [-3, 0, -3],
-                  [5, 5, 5]]),
-        np.array([[-3, -3, -3],
-                  [-3, 0, 5],
-                  [-3, 5, 5]]),
-        np.array([[-3, -3, 5],
-                  [-3, 0, 5],
-                  [-3, -3, 5]]),
-        np.array([[5, 5, 5],
-                  [-3, 0, -3],
-                  [-3, -3, -3]])
-    ]
-    responses = np.array([_convolve(arr, k) for k in kirsch_kernels])
-    return _to_image(np.max(responses, axis=0))
+    func = partial(_kirsch_response, return_direction=return_direction)
+    if parallel.should_parallelize(arr.shape):
+        response = parallel.run_strips(func, arr, 1)
+    else:
+        response = func(arr)
+
+    if return_direction:
+        return _to_image(response[..., 0]), response[..., 1].astype(np.uint8)
+    return _to_image(response)
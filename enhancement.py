@@ -1,22 +1,28 @@
 from PIL import Image, ImageFilter, ImageEnhance, ImageOps
 import numpy as np
+import threading
+import weakref
+from functools import lru_cache
+
+from fft_utils import pad_for_fft, padded_shape, rfft_distance
+from lut import apply_ops, brightness_op, contrast_op
 
 # === ENHANCEMENT OPERATIONS ===
 
+# Brightness dan contrast dijalankan sebagai tabel 256 entri (lut.py) dengan hasil yang sama
+# seperti ImageEnhance; mode di luar LUT_MODES memakai ImageEnhance langsung
 def adjust_brightness(img: Image.Image, factor=1.0) -> Image.Image:
-    enhancer = ImageEnhance.Brightness(img)
-    return enhancer.enhance(factor)
+    return apply_ops(img, [brightness_op(factor, fallback=lambda im: ImageEnhance.Brightness(im).enhance(factor))])
 
 def adjust_contrast(img: Image.Image, factor=1.0) -> Image.Image:
-    enhancer = ImageEnhance.Contrast(img)
-    return enhancer.enhance(factor)
+    return apply_ops(img, [contrast_op(factor, fallback=lambda im: ImageEnhance.Contrast(im).enhance(factor))])
 
 def histogram_equalization(img: Image.Image) -> Image.Image:
     if img.mode != "L":
         img = img.convert("L")
     return ImageOps.equalize(img)
 
-def smoothing(img: Image.Image, method="lowpass") -> Image.Image:
+def smoothing(img: Image.Image, method="lowpass", cutoff=80, color=False) -> Image.Image:
     """
     Fungsi smoothing / filter citra.
 
@@ -25,6 +31,8 @@ def smoothing(img: Image.Image, method="lowpass") -> Image.Image:
         "median"    -> Spatial Domain Median Filtering
         "ilpf"      -> Frequency Domain Ideal Low Pass Filter
         "blpf"      -> Frequency Domain Butterworth Low Pass Filter
+    cutoff: radius cutoff untuk ilpf/blpf
+    color: True agar ilpf/blpf mempertahankan warna (RGB)
     """
     img_copy = img.copy()
 
@@ -38,52 +46,25 @@ def smoothing(img: Image.Image, method="lowpass") -> Image.Image:
 
     elif method in ["ilpf", "blpf"]:
         # Frequency Domain
-        return frequency_lowpass_filter(img_copy, filter_type="ideal" if method=="ilpf" else "butterworth", cutoff=80, order=2)
+        return frequency_lowpass_filter(img, filter_type="ideal" if method=="ilpf" else "butterworth", cutoff=cutoff, order=2, color=color)
 
     else:
         raise ValueError("Method smoothing tidak dikenali.")
 
 
-def frequency_lowpass_filter(img, filter_type="ideal", cutoff=30, order=2):
+def frequency_lowpass_filter(img, filter_type="ideal", cutoff=30, order=2, color=False, fast=False):
     """
     Filter Lowpass di Domain Frekuensi.
     filter_type: "ideal" atau "butterworth"
     cutoff: radius cutoff
     order: hanya untuk butterworth
+    color: True untuk memfilter citra RGB per channel (tanpa dikonversi ke grayscale)
+    fast: True untuk FFT dengan padding 5-smooth (lebih cepat pada ukuran "lambat",
+          tetapi piksel di dekat tepi bisa sedikit berbeda)
     """
-    # Konversi ke grayscale
-    img_gray = img.convert("L")
-    img_arr = np.array(img_gray, dtype=np.float32)
-
-    # FFT
-    f = np.fft.fft2(img_arr)
-    fshift = np.fft.fftshift(f)
-
-    # Buat filter mask
-    rows, cols = img_arr.shape
-    crow, ccol = rows//2, cols//2
-    Y, X = np.ogrid[:rows, :cols]
-    distance = np.sqrt((X - ccol)**2 + (Y - crow)**2)
-
-    if filter_type == "ideal":
-        mask = distance <= cutoff
-    elif filter_type == "butterworth":
-        mask = 1 / (1 + (distance / cutoff)**(2*order))
-    else:
-        raise ValueError("filter_type harus 'ideal' atau 'butterworth'")
-
-    # Terapkan mask
-    fshift_filtered = fshift * mask
-
-    # IFFT
-    f_ishift = np.fft.ifftshift(fshift_filtered)
-    img_back = np.fft.ifft2(f_ishift)
-    img_back = np.abs(img_back)
-    img_back = np.clip(img_back, 0, 255).astype(np.uint8)
+    return get_frequency_session(img, color, fast).apply("low", filter_type, cutoff, order)
 
-    return Image.fromarray(img_back)
-
-def sharpening(img: Image.Image, method="highpass", intensity=1) -> Image.Image:
+def sharpening(img: Image.Image, method="highpass", intensity=1, color=False) -> Image.Image:
     img_copy = img.copy()
 
     if method == "highpass":
@@ -105,10 +86,11 @@ def sharpening(img: Image.Image, method="highpass", intensity=1) -> Image.Image:
         # frequency highpass dengan cutoff sebagai intensity
         cutoff = max(intensity, 1)  # pastikan cutoff >=1
         return frequency_highpass_filter(
-            img_copy,
+            img,
             filter_type="ideal" if method=="ihpf" else "butterworth",
             cutoff=cutoff,
-            order=2
+            order=2,
+            color=color
         )
 
     else:
@@ -116,48 +98,112 @@ def sharpening(img: Image.Image, method="highpass", intensity=1) -> Image.Image:
 
 
 
-def frequency_highpass_filter(img, filter_type="ideal", cutoff=30, order=2):
+def frequency_highpass_filter(img, filter_type="ideal", cutoff=30, order=2, color=False, fast=False):
     """
     Filter Highpass di Domain Frekuensi.
     filter_type: "ideal" atau "butterworth"
     cutoff: radius cutoff
     order: hanya untuk butterworth
+    color: True untuk memfilter citra RGB per channel (tanpa dikonversi ke grayscale)
+    fast: True untuk FFT dengan padding 5-smooth (lebih cepat pada ukuran "lambat",
+          tetapi piksel di dekat tepi bisa sedikit berbeda)
     """
-    # Konversi ke grayscale
-    img_gray = img.convert("L")
-    img_arr = np.array(img_gray, dtype=np.float32)
-
-    # FFT
-    f = np.fft.fft2(img_arr)
-    fshift = np.fft.fftshift(f)
-
-    # Buat filter mask
-    rows, cols = img_arr.shape
-    crow, ccol = rows//2, cols//2
-    Y, X = np.ogrid[:rows, :cols]
-    distance = np.sqrt((X - ccol)**2 + (Y - crow)**2)
-
-    if filter_type == "ideal":
-        mask = distance > cutoff
-    elif filter_type == "butterworth":
-        mask = 1 / (1 + (cutoff / distance)**(2*order))
-        mask[crow, ccol] = 0  # hindari divide by zero
-    else:
+    return get_frequency_session(img, color, fast).apply("high", filter_type, cutoff, order)
+
+
+# Jumlah mask yang disimpan; satu mask float32 seukuran setengah spektrum (±200 MB untuk
+# citra 100 MP), jadi cukup untuk slider yang bolak-balik antara beberapa nilai terakhir
+_MASK_CACHE_SIZE = 3
+
+
+@lru_cache(maxsize=_MASK_CACHE_SIZE)
+def frequency_mask(fft_shape, orig_shape, band, filter_type, cutoff, order):
+    """
+    Mask filter frekuensi untuk spektrum rfft2 berukuran fft_shape (setengah spektrum).
+    Jarak dihitung dalam satuan indeks citra asli (orig_shape) agar cutoff tetap sama
+    walaupun citra di-padding. Hasil di-cache (LRU) berdasarkan (shape, band,
+    filter_type, cutoff, order), sehingga menggeser slider kembali ke nilai
+    sebelumnya tidak membangun ulang mask.
+    """
+    distance = rfft_distance(fft_shape, orig_shape)
+
+    if filter_type not in ("ideal", "butterworth"):
         raise ValueError("filter_type harus 'ideal' atau 'butterworth'")
 
-    # Terapkan mask
-    fshift_filtered = fshift * mask
+    if band == "low":
+        if filter_type == "ideal":
+            mask = distance <= cutoff
+        else:
+            mask = 1 / (1 + (distance / cutoff)**(2*order))
+    else:
+        if filter_type == "ideal":
+            mask = distance > cutoff
+        else:
+            with np.errstate(divide="ignore"):
+                mask = 1 / (1 + (cutoff / distance)**(2*order))
+            mask[0, 0] = 0  # hindari divide by zero
 
-    # IFFT
-    f_ishift = np.fft.ifftshift(fshift_filtered)
-    img_back = np.fft.ifft2(f_ishift)
-    img_back = np.abs(img_back)
-    img_back = np.clip(img_back, 0, 255).astype(np.uint8)
+    mask = mask.astype(np.float32)
+    mask.setflags(write=False)
+    return mask
 
-    return Image.fromarray(img_back)
 
+class FrequencySession:
+    """
+    Sesi filter domain frekuensi untuk satu citra sumber.
+    Spektrum dihitung sekali dengan rfft2 (input real, setengah spektrum);
+    setiap perubahan cutoff hanya mengalikan mask (dari cache LRU) lalu irfft2.
+    pad=False (default): FFT ukuran asli, hasil sama dengan filter sebelumnya.
+    pad=True (mode cepat, opt-in): sumbu dengan faktor prima besar di-padding tepi ke
+    ukuran 5-smooth lalu dipotong kembali; piksel di dekat tepi bisa sedikit berbeda.
+    color=True: filter diterapkan pada channel R, G, B sekaligus (hasil RGB).
+    """
+
+    def __init__(self, img, pad=False, color=False):
+        self.source = weakref.ref(img)
+        self.color = color
+        self.pad = pad
+        img_arr = np.array(img.convert("RGB" if color else "L"), dtype=np.float64)
+        self.shape = img_arr.shape[:2]
+        self.fft_shape = padded_shape(self.shape) if pad else self.shape
+        # Mode warna: ketiga channel ditransformasi dalam satu panggilan FFT (axes 0, 1)
+        self.spectrum = np.fft.rfft2(pad_for_fft(img_arr, self.fft_shape), axes=(0, 1))
+
+    def apply(self, band="low", filter_type="ideal", cutoff=30, order=2):
+        mask = frequency_mask(self.fft_shape, self.shape, band, filter_type, cutoff, order)
+        if self.color:
+            mask = mask[:, :, None]
+
+        # Terapkan mask (dibroadcast ke semua channel pada mode warna)
+        f_filtered = self.spectrum * mask
+
+        # IFFT, potong kembali ke ukuran asli
+        rows, cols = self.shape
+        img_back = np.fft.irfft2(f_filtered, s=self.fft_shape, axes=(0, 1))[:rows, :cols]
+        img_back = np.abs(img_back)
+        img_back = np.clip(img_back, 0, 255).astype(np.uint8)
+
+        return Image.fromarray(img_back)
+
+
+# Sesi terakhir dipakai ulang selama citra sumbernya sama (mis. saat slider cutoff digeser)
+_last_session = None
+_session_lock = threading.Lock()
+
+def get_frequency_session(img, color=False, fast=False):
+    global _last_session
+    with _session_lock:
+        session = _last_session
+        if (
+            session is None
+            or session.source() is not img
+            or session.color != color
+            or session.pad != fast
+        ):
+            session = FrequencySession(img, pad=fast, color=color)
+            _last_session = session
+        return session
 
-from PIL import Image, ImageEnhance, ImageOps
 
 def correction(img: Image.Image) -> Image.Image:
     # Pastikan gambar dalam mode RGB
@@ -175,4 +221,3 @@ def correction(img: Image.Image) -> Image.Image:
     corrected = enhancer_brightness.enhance(1.05)
 
     return corrected
-
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Ukuran FFT "cepat": bilangan >= n yang faktor primanya hanya 2, 3 dan 5
+def next_fast_len(n):
+    if n <= 6:
+        return max(n, 1)
+    best = 2 ** int(np.ceil(np.log2(n)))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # Kalikan dengan pangkat 2 terkecil agar >= n
+            quotient = -(-n // p35)
+            p2 = 1 << max(int(quotient - 1).bit_length(), 0)
+            candidate = p2 * p35
+            if candidate == n:
+                return n
+            if candidate < best:
+                best = candidate
+            p35 *= 3
+        p5 *= 5
+    return best
+
+# Ukuran FFT cepat untuk tiap sumbu pada shape
+def fast_shape(shape):
+    return tuple(next_fast_len(int(n)) for n in shape)
+
+# Faktor prima terbesar dari n
+def _largest_prime_factor(n):
+    largest, p = 1, 2
+    while p * p <= n:
+        while n % p == 0:
+            largest, n = p, n // p
+        p += 1
+    return max(largest, n) if n > 1 else largest
+
+# Panjang sumbu minimum yang di-padding; sumbu pendek sudah cepat tanpa padding
+MIN_PAD_LENGTH = 1024
+
+# Sumbu perlu di-padding jika panjang dan punya faktor prima > 7
+# (pocketfft cepat untuk faktor 2, 3, 5, 7; faktor prima besar jauh lebih lambat)
+def needs_padding(n):
+    return n >= MIN_PAD_LENGTH and _largest_prime_factor(int(n)) > 7
+
+# Shape FFT untuk array berukuran shape: sumbu "lambat" dibulatkan ke ukuran 5-smooth
+def padded_shape(shape):
+    return tuple(next_fast_len(n) if needs_padding(n) else n for n in shape)
+
+# Padding tepi (di akhir tiap sumbu spasial) sampai ukuran FFT; hasilnya dipotong kembali setelah IFFT
+def pad_for_fft(arr, shape):
+    pad = [(0, shape[0] - arr.shape[0]), (0, shape[1] - arr.shape[1])]
+    pad += [(0, 0)] * (arr.ndim - 2)
+    if all(p == (0, 0) for p in pad):
+        return arr
+    return np.pad(arr, pad, mode="edge")
+
+# Jarak tiap frekuensi spektrum rfft2 (ukuran fft_shape) ke pusat, dalam satuan indeks
+# citra asli (orig_shape) sehingga cutoff tetap bermakna sama setelah padding
+def rfft_distance(fft_shape, orig_shape):
+    # Indeks frekuensi bulat (urutan fftfreq) dikali rasio ukuran; tanpa padding rasionya 1,
+    # jadi jaraknya tepat sama dengan jarak bilangan bulat ke pusat spektrum
+    ky = np.arange(fft_shape[0])
+    ky[ky >= (fft_shape[0] + 1) // 2] -= fft_shape[0]
+    kx = np.arange(fft_shape[1] // 2 + 1)
+    fy = ky * (orig_shape[0] / fft_shape[0])
+    fx = kx * (orig_shape[1] / fft_shape[1])
+    return np.sqrt(fy[:, None] ** 2 + fx[None, :] ** 2)
+
+# Magnitude spektrum penuh (H, W) dari spektrum rfft2 (H, W//2+1) memakai simetri Hermitian:
+# |F[k, l]| = |F[-k, -l]|
+def full_magnitude(half, width):
+    h = half.shape[0]
+    mag_half = np.abs(half)
+    full = np.empty((h, width), dtype=mag_half.dtype)
+    split = width // 2 + 1
+    full[:, :split] = mag_half
+    if width > split:
+        rows = (-np.arange(h)) % h
+        cols = width - np.arange(split, width)
+        full[:, split:] = mag_half[rows][:, cols]
+    return full
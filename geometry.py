@@ -0,0 +1,338 @@
+import math
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+import resampling
+
+# Urutan "kualitas" resample; transformasi gabungan memakai resample tertinggi dari operasinya
+_RESAMPLE_RANK = {Image.NEAREST: 0, Image.BILINEAR: 1, Image.BICUBIC: 2, Image.LANCZOS: 3}
+
+# Toleransi saat mengenali matrix khusus (transpose, skala sejajar sumbu, geser bulat)
+_EPS = 1e-9
+
+# Jika area sumber yang terlihat kurang dari rasio ini, sumber di-crop dulu sebelum transform
+_CROP_FIRST_RATIO = 0.5
+
+# Piksel tambahan di sekitar area crop agar interpolasi di tepinya tetap memakai tetangga asli
+_CROP_MARGIN = 3
+
+# Jumlah baris per blok saat membuat mask batas keluaran
+_BLOCK_ROWS = 512
+
+# Transformasi forward (input -> output) tiap metode transpose untuk citra berukuran (w, h)
+_TRANSPOSE_FORWARD = {
+    Image.FLIP_LEFT_RIGHT: lambda w, h: [[-1, 0, w], [0, 1, 0], [0, 0, 1]],
+    Image.FLIP_TOP_BOTTOM: lambda w, h: [[1, 0, 0], [0, -1, h], [0, 0, 1]],
+    Image.ROTATE_180: lambda w, h: [[-1, 0, w], [0, -1, h], [0, 0, 1]],
+    Image.ROTATE_90: lambda w, h: [[0, 1, 0], [-1, 0, w], [0, 0, 1]],
+    Image.ROTATE_270: lambda w, h: [[0, -1, h], [1, 0, 0], [0, 0, 1]],
+    Image.TRANSPOSE: lambda w, h: [[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+    Image.TRANSVERSE: lambda w, h: [[0, -1, h], [-1, 0, w], [0, 0, 1]],
+}
+
+
+class Affine:
+    """
+    Transformasi geometrik tertunda: matrix 3x3 yang memetakan koordinat masukan ke keluaran
+    (koordinat kontinu, tepi piksel di bilangan bulat), ukuran keluaran, dan resample.
+    Operasi berurutan digabung menjadi satu matrix sehingga citra hanya di-resample sekali.
+    resample=None berarti belum ada operasi yang memerlukan interpolasi.
+    bounds: poligon (koordinat keluaran) area yang masih berisi piksel setelah semua operasi;
+    bagian yang terpotong oleh operasi sebelumnya (crop, translasi) tetap hitam seperti jika
+    operasi dijalankan satu per satu.
+    """
+
+    def __init__(self, size, matrix=None, resample=None, input_size=None, bounds=None):
+        self.size = (int(size[0]), int(size[1]))
+        self.input_size = self.size if input_size is None else input_size
+        self.matrix = np.eye(3) if matrix is None else np.asarray(matrix, dtype=np.float64)
+        self.resample = resample
+        if bounds is None:
+            bounds = _clip_polygon(_map_points(self.matrix, _rect(self.input_size)), self.size)
+        self.bounds = bounds
+
+    # Menambahkan transformasi forward (3x3) dengan ukuran keluaran baru
+    def then(self, forward, size, resample=None):
+        if resample is None or self.resample is None:
+            combined = resample if self.resample is None else self.resample
+        else:
+            combined = max(resample, self.resample, key=_RESAMPLE_RANK.get)
+        forward = np.asarray(forward, dtype=np.float64)
+        matrix = forward @ self.matrix
+        bounds = _clip_polygon(_map_points(forward, self.bounds), size)
+        return Affine(size, matrix, combined, self.input_size, bounds)
+
+    # Transformasi yang sama untuk masukan berukuran lain (mis. versi kecil untuk tampilan):
+    # koordinat masukan dan keluaran diskalakan dengan rasio yang sama
+    def rescaled(self, input_size):
+        sx = input_size[0] / self.input_size[0]
+        sy = input_size[1] / self.input_size[1]
+        scale = np.diag([sx, sy, 1.0])
+        matrix = scale @ self.matrix @ np.diag([1 / sx, 1 / sy, 1.0])
+        size = (max(1, round(self.size[0] * sx)), max(1, round(self.size[1] * sy)))
+        bounds = [(x * sx, y * sy) for x, y in self.bounds]
+        return Affine(size, matrix, self.resample or Image.BILINEAR, input_size, bounds)
+
+    # Geser isi citra sejauh (-tx, -ty), ukuran tetap (sama dengan basic_ops.translation)
+    def translate(self, tx=50, ty=50):
+        forward = [[1, 0, -tx], [0, 1, -ty], [0, 0, 1]]
+        return self.then(forward, self.size, Image.NEAREST)
+
+    # Rotasi berlawanan arah jarum jam dengan expand (matrix sama dengan Image.rotate)
+    def rotate(self, angle=45):
+        w, h = self.size
+        inverse, size = _rotate_matrix(w, h, angle)
+        return self.then(np.linalg.inv(inverse), size, Image.NEAREST)
+
+    # Zoom dengan faktor; ukuran keluaran int(w * factor) seperti basic_ops.zooming
+    def zoom(self, factor=1.2):
+        w, h = self.size
+        nw, nh = int(w * factor), int(h * factor)
+        forward = [[nw / w, 0, 0], [0, nh / h, 0], [0, 0, 1]]
+        return self.then(forward, (nw, nh), Image.BICUBIC)
+
+    # Flip horizontal/vertical
+    def flip(self, mode="horizontal"):
+        w, h = self.size
+        if mode == "horizontal":
+            forward = [[-1, 0, w], [0, 1, 0], [0, 0, 1]]
+        else:
+            forward = [[1, 0, 0], [0, -1, h], [0, 0, 1]]
+        return self.then(forward, self.size)
+
+    # Crop dengan box (left, top, right, bottom)
+    def crop(self, box=(50, 50, 200, 200)):
+        left, top, right, bottom = box
+        forward = [[1, 0, -left], [0, 1, -top], [0, 0, 1]]
+        return self.then(forward, (right - left, bottom - top))
+
+    # Menjalankan transformasi gabungan pada img (berukuran input_size) dengan resample sekali:
+    # bagian flip/rotasi 90° dikerjakan lossless dengan transpose, sisanya berupa crop (geser bulat),
+    # resize dengan box (skala sejajar sumbu) atau satu Image.transform pada area yang terlihat saja
+    def apply(self, img):
+        matrix = self.matrix
+        method = _transpose_method(matrix)
+        if method is not None:
+            forward = np.asarray(_TRANSPOSE_FORWARD[method](*img.size), dtype=np.float64)
+            img = img.transpose(method)
+            matrix = matrix @ np.linalg.inv(forward)
+
+        resample = self.resample or Image.NEAREST
+        if _is_axis_aligned(matrix):
+            out = _apply_axis_aligned(img, matrix, self.size, resample)
+        else:
+            out = _apply_transform(img, matrix, self.size, resample)
+
+        if self._clipped():
+            out = _mask_outside(out, self.bounds)
+        return out
+
+    # Apakah operasi sebelumnya memotong area yang tidak akan terpotong oleh transformasi tunggal
+    def _clipped(self):
+        full = _clip_polygon(_map_points(self.matrix, _rect(self.input_size)), self.size)
+        return _area(self.bounds) < _area(full) - 1e-6 * max(1.0, _area(full))
+
+
+# Metode transpose yang membuat bagian linear matrix menjadi skala positif sejajar sumbu,
+# atau None jika tidak perlu (sudah positif) atau tidak mungkin (rotasi bukan kelipatan 90°)
+def _transpose_method(matrix):
+    (a, b), (d, e) = matrix[:2, :2]
+    if abs(b) < _EPS and abs(d) < _EPS:
+        return {
+            (True, True): None,
+            (False, True): Image.FLIP_LEFT_RIGHT,
+            (True, False): Image.FLIP_TOP_BOTTOM,
+            (False, False): Image.ROTATE_180,
+        }[(a > 0, e > 0)]
+    if abs(a) < _EPS and abs(e) < _EPS:
+        return {
+            (True, True): Image.TRANSPOSE,
+            (True, False): Image.ROTATE_90,
+            (False, True): Image.ROTATE_270,
+            (False, False): Image.TRANSVERSE,
+        }[(b > 0, d > 0)]
+    return None
+
+def _is_axis_aligned(matrix):
+    return abs(matrix[0, 1]) < _EPS and abs(matrix[1, 0]) < _EPS and matrix[0, 0] > 0 and matrix[1, 1] > 0
+
+# Skala positif sejajar sumbu: geser bulat tanpa skala cukup di-crop (lossless, area di luar
+# citra menjadi hitam); selain itu bagian yang terlihat di-resize dengan box lewat
+# resampling.resize (tetap antialias saat memperkecil, faktor bulat memakai Image.reduce)
+def _apply_axis_aligned(img, matrix, size, resample):
+    sx, tx = matrix[0, 0], matrix[0, 2]
+    sy, ty = matrix[1, 1], matrix[1, 2]
+    w, h = size
+    if abs(sx - 1) < _EPS and abs(sy - 1) < _EPS and _is_integer(tx) and _is_integer(ty):
+        left, top = -round(tx), -round(ty)
+        return img.crop((left, top, left + w, top + h))
+
+    # Bagian keluaran (piksel utuh) yang sumbernya berada di dalam citra
+    left = max(0, math.ceil(tx - _EPS))
+    top = max(0, math.ceil(ty - _EPS))
+    right = min(w, math.floor(sx * img.width + tx + _EPS))
+    bottom = min(h, math.floor(sy * img.height + ty + _EPS))
+    if right <= left or bottom <= top:
+        return _blank(img, size)
+    box = (
+        max(0.0, (left - tx) / sx), max(0.0, (top - ty) / sy),
+        min(float(img.width), (right - tx) / sx), min(float(img.height), (bottom - ty) / sy),
+    )
+    part = resampling.resize(img, (right - left, bottom - top), resample, box=box)
+    if part.size == size:
+        return part
+    out = _blank(img, size)
+    out.paste(part, (left, top))
+    return out
+
+def _is_integer(value):
+    return abs(value - round(value)) < _EPS
+
+# Satu Image.transform. Jika area sumber yang terlihat jauh lebih kecil dari citra,
+# sumber di-crop dulu sehingga konversi internal PIL (mis. RGBA premultiplied) tidak
+# dikerjakan pada seluruh citra.
+def _apply_transform(img, matrix, size, resample):
+    if resample not in (Image.NEAREST, Image.BILINEAR, Image.BICUBIC):
+        resample = Image.BICUBIC
+    inverse = np.linalg.inv(matrix)
+
+    xs, ys = zip(*_map_points(inverse, _rect(size)))
+    left = max(0, math.floor(min(xs)) - _CROP_MARGIN)
+    top = max(0, math.floor(min(ys)) - _CROP_MARGIN)
+    right = min(img.width, math.ceil(max(xs)) + _CROP_MARGIN)
+    bottom = min(img.height, math.ceil(max(ys)) + _CROP_MARGIN)
+    if right <= left or bottom <= top:
+        return _blank(img, size)
+    if (right - left) * (bottom - top) < _CROP_FIRST_RATIO * img.width * img.height:
+        img = img.crop((left, top, right, bottom))
+        inverse = np.array([[1, 0, -left], [0, 1, -top], [0, 0, 1]]) @ inverse
+
+    data = tuple(inverse[:2].ravel())
+    return img.transform(size, Image.AFFINE, data, resample=resample)
+
+# Citra hitam berukuran size dengan mode (dan palet) yang sama dengan img
+def _blank(img, size):
+    out = Image.new(img.mode, size)
+    if img.mode == "P":
+        out.putpalette(img.getpalette())
+    return out
+
+# Menghitamkan piksel yang pusatnya di luar poligon bounds (konveks)
+def _mask_outside(img, polygon):
+    w, h = img.size
+    if len(polygon) < 3:
+        return _blank(img, img.size)
+    orientation = 1.0 if _signed_area(polygon) >= 0 else -1.0
+    xs = np.arange(w, dtype=np.float64)[None, :] + 0.5
+    inside = np.empty((h, w), dtype=bool)
+    for y0 in range(0, h, _BLOCK_ROWS):
+        ys = np.arange(y0, min(h, y0 + _BLOCK_ROWS), dtype=np.float64)[:, None] + 0.5
+        block = inside[y0:y0 + _BLOCK_ROWS]
+        block[:] = True
+        for (ax, ay), (bx, by) in zip(polygon, polygon[1:] + polygon[:1]):
+            cross = (bx - ax) * (ys - ay) - (by - ay) * (xs - ax)
+            block &= cross * orientation >= -1e-9
+
+    outside = Image.fromarray(np.where(inside, 0, 255).astype(np.uint8))
+    img.paste(0, mask=outside)
+    return img
+
+
+# Sudut persegi panjang citra (w, h) sebagai poligon
+def _rect(size):
+    w, h = size
+    return [(0.0, 0.0), (float(w), 0.0), (float(w), float(h)), (0.0, float(h))]
+
+# Memetakan titik-titik dengan matrix 3x3
+def _map_points(matrix, points):
+    return [
+        (matrix[0, 0] * x + matrix[0, 1] * y + matrix[0, 2], matrix[1, 0] * x + matrix[1, 1] * y + matrix[1, 2])
+        for x, y in points
+    ]
+
+# Memotong poligon konveks dengan persegi panjang [0, w] x [0, h] (Sutherland-Hodgman)
+def _clip_polygon(points, size):
+    w, h = size
+    edges = (
+        lambda p: p[0] >= 0, lambda p: p[0] <= w,
+        lambda p: p[1] >= 0, lambda p: p[1] <= h,
+    )
+    bounds = ((0, 0.0), (0, float(w)), (1, 0.0), (1, float(h)))
+    for inside, (axis, value) in zip(edges, bounds):
+        clipped = []
+        for i, cur in enumerate(points):
+            prev = points[i - 1]
+            if inside(cur):
+                if not inside(prev):
+                    clipped.append(_intersect(prev, cur, axis, value))
+                clipped.append(cur)
+            elif inside(prev):
+                clipped.append(_intersect(prev, cur, axis, value))
+        points = clipped
+        if not points:
+            break
+    return points
+
+def _intersect(p, q, axis, value):
+    t = (value - p[axis]) / (q[axis] - p[axis])
+    return (p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+
+def _signed_area(points):
+    return 0.5 * sum(
+        x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])
+    )
+
+def _area(points):
+    return abs(_signed_area(points)) if len(points) >= 3 else 0.0
+
+
+# Matrix invers (keluaran -> masukan) dan ukuran keluaran Image.rotate(angle, expand=True)
+def _rotate_matrix(w, h, angle):
+    rad = -math.radians(angle % 360)
+    a, b = round(math.cos(rad), 15), round(math.sin(rad), 15)
+    d, e = round(-math.sin(rad), 15), round(math.cos(rad), 15)
+    cx, cy = w / 2.0, h / 2.0
+    c = a * -cx + b * -cy + cx
+    f = d * -cx + e * -cy + cy
+
+    xs, ys = [], []
+    for x, y in ((0, 0), (w, 0), (w, h), (0, h)):
+        xs.append(a * x + b * y + c)
+        ys.append(d * x + e * y + f)
+    nw = math.ceil(max(xs)) - math.floor(min(xs))
+    nh = math.ceil(max(ys)) - math.floor(min(ys))
+    tx, ty = -(nw - w) / 2.0, -(nh - h) / 2.0
+    c, f = a * tx + b * ty + c, d * tx + e * ty + f
+    return np.array([[a, b, c], [d, e, f], [0, 0, 1]]), (nw, nh)
+
+
+# Jumlah hasil geometrik yang transformasi tertundanya diingat
+_CACHE_SIZE = 3
+_pending = OrderedDict()
+_lock = threading.Lock()
+
+# Menjalankan operasi geometrik build(affine) -> affine pada img. Jika img sendiri hasil
+# operasi geometrik sebelumnya, operasi digabung dengan transformasi tertundanya dan dihitung
+# sekali dari citra sumbernya (rotasi dua kali atau rotasi lalu zoom hanya di-resample sekali).
+# Seperti gradient.cached_for_image, hasil dikenali dari identitas objek Image.
+def transform_image(img, build):
+    with _lock:
+        entry = _pending.get(id(img))
+        if entry is not None and entry[0]() is img:
+            source, affine = entry[1], entry[2]
+        else:
+            source, affine = img, Affine(img.size)
+
+    affine = build(affine)
+    result = affine.apply(source)
+
+    with _lock:
+        _pending[id(result)] = (weakref.ref(result), source, affine)
+        _pending.move_to_end(id(result))
+        while len(_pending) > _CACHE_SIZE:
+            _pending.popitem(last=False)
+    return result
@@ -0,0 +1,121 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from convolution_engine import convolve2d
+
+# Kernel gradien (x ke kanan positif, y ke bawah positif)
+GRADIENT_KERNELS = {
+    "sobel": (
+        np.array([[-1, 0, 1],
+                  [-2, 0, 2],
+                  [-1, 0, 1]]),
+        np.array([[-1, -2, -1],
+                  [0, 0, 0],
+                  [1, 2, 1]]),
+    ),
+    "prewitt": (
+        np.array([[-1, 0, 1],
+                  [-1, 0, 1],
+                  [-1, 0, 1]]),
+        np.array([[-1, -1, -1],
+                  [0, 0, 0],
+                  [1, 1, 1]]),
+    ),
+}
+
+# Jumlah entri yang disimpan di cache (tiap entri berisi satu/beberapa array seukuran citra)
+_CACHE_SIZE = 3
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class Gradient:
+    """
+    Hasil gradien satu citra: gx, gy (int16 untuk input uint8, float32 untuk input float),
+    serta magnitude dan direction yang dihitung sekali saat pertama kali diakses.
+    """
+
+    def __init__(self, gx, gy):
+        self.gx = gx
+        self.gy = gy
+        self._magnitude = None
+        self._direction = None
+
+    @property
+    def magnitude(self):
+        if self._magnitude is None:
+            self._magnitude = magnitude(self.gx, self.gy)
+        return self._magnitude
+
+    @property
+    def direction(self):
+        if self._direction is None:
+            self._direction = np.arctan2(self.gy, self.gx)
+        return self._direction
+
+    # Threshold magnitude (di-clip ke 0-255) menjadi citra biner 0/255
+    def threshold(self, t):
+        edges = np.minimum(self.magnitude, 255) > t
+        return edges.astype(np.uint8) * 255
+
+
+# Jumlah baris per blok saat menghitung magnitude (membatasi array sementara)
+_BLOCK_ROWS = 512
+
+# Magnitude gradien dalam float32 (gx/gy boleh int16 dari jalur integer tanpa overflow).
+# Dihitung per blok baris agar tidak ada array sementara float32 seukuran citra.
+def magnitude(gx, gy):
+    mag = np.empty(gx.shape, dtype=np.float32)
+    for y in range(0, gx.shape[0], _BLOCK_ROWS):
+        rows = slice(y, y + _BLOCK_ROWS)
+        np.square(gx[rows], out=mag[rows], dtype=np.float32)
+        mag[rows] += np.square(gy[rows], dtype=np.float32)
+        np.sqrt(mag[rows], out=mag[rows])
+    return mag
+
+# Konversi gambar ke array grayscale uint8 (jalur convolution integer)
+def _to_gray(img):
+    if img.mode != "L":
+        img = img.convert("L")
+    return np.asarray(img, dtype=np.uint8)
+
+# Mengambil hasil turunan citra (gradien, NMS, dll.) dari cache, atau menghitungnya
+# sekali dengan compute(img). Cache memakai identitas objek Image
+# (citra tidak diubah in-place di aplikasi ini).
+def cached_for_image(img, name, compute):
+    key = (id(img), name)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0]() is img:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    value = compute(img)
+
+    with _lock:
+        _cache[key] = (weakref.ref(img), value)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+# Menghitung gradien array grayscale dengan operator "sobel" atau "prewitt"
+def compute_gradient(arr, operator="sobel"):
+    if operator not in GRADIENT_KERNELS:
+        raise ValueError("operator harus 'sobel' atau 'prewitt'")
+    kx, ky = GRADIENT_KERNELS[operator]
+    return Gradient(convolve2d(arr, kx), convolve2d(arr, ky))
+
+# Mengambil gradien citra dari cache, atau menghitungnya sekali jika belum ada
+def get_gradient(img, operator="sobel"):
+    if operator not in GRADIENT_KERNELS:
+        raise ValueError("operator harus 'sobel' atau 'prewitt'")
+    return cached_for_image(img, operator, lambda im: compute_gradient(_to_gray(im), operator))
+
+# Mengosongkan cache gradien
+def clear_gradient_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,590 @@
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+# Batas memori default untuk state history (byte)
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Jumlah state terdekat dari citra aktif yang diusahakan tetap mentah (undo instan)
+DEFAULT_RAW_STATES = 2
+
+# Level zlib: level rendah jauh lebih cepat dan rasio kompresinya cukup untuk citra hasil olahan
+_ZLIB_LEVEL = 1
+
+# Tingkat penyimpanan state
+RAW, COMPRESSED, DISK = "raw", "compressed", "disk"
+
+
+# Perkiraan ukuran data piksel citra di memori (byte). PIL menyimpan citra multi-band
+# (RGB, RGBA, LA, ...) serta mode I/F dalam 4 byte per piksel.
+def image_nbytes(img):
+    if img.mode.startswith("I;16"):
+        per_pixel = 2
+    elif img.mode in ("I", "F") or len(img.getbands()) > 1:
+        per_pixel = 4
+    else:
+        per_pixel = 1
+    return img.width * img.height * per_pixel
+
+
+class _State:
+    """
+    Satu state history. Citra disimpan mentah, terkompresi zlib di RAM, atau
+    terkompresi di file sementara. Perpindahan tingkat dilakukan di thread latar.
+    """
+
+    def __init__(self, img):
+        self._lock = threading.Lock()
+        self.mode = img.mode
+        self.size = img.size
+        self.palette = img.getpalette() if img.mode == "P" else None
+        self.raw_nbytes = image_nbytes(img)
+        self.tier = RAW
+        self._image = img
+        self._data = None
+        self._path = None
+        self._disk_nbytes = 0
+        self.discarded = False
+
+    # Byte yang dipakai di RAM
+    @property
+    def ram_bytes(self):
+        if self.tier == RAW:
+            return self.raw_nbytes
+        if self.tier == COMPRESSED:
+            return len(self._data)
+        return 0
+
+    # Byte yang dipakai di disk
+    @property
+    def disk_bytes(self):
+        return self._disk_nbytes if self.tier == DISK else 0
+
+    # Mengembalikan citra dari tingkat mana pun
+    def image(self):
+        with self._lock:
+            if self.tier == RAW:
+                return self._image
+            data = self._data
+            if self.tier == DISK:
+                with open(self._path, "rb") as f:
+                    data = f.read()
+        img = Image.frombytes(self.mode, self.size, zlib.decompress(data))
+        if self.palette is not None:
+            img.putpalette(self.palette)
+        return img
+
+    # Mentah -> terkompresi (kompresi dilakukan di luar lock)
+    def compress(self):
+        with self._lock:
+            if self.tier != RAW or self.discarded:
+                return
+            img = self._image
+        data = zlib.compress(img.tobytes(), _ZLIB_LEVEL)
+        with self._lock:
+            if self.tier == RAW and not self.discarded:
+                self._data, self._image, self.tier = data, None, COMPRESSED
+
+    # Terkompresi -> file di direktori spill
+    def spill(self, directory):
+        with self._lock:
+            if self.tier != COMPRESSED or self.discarded:
+                return
+            data = self._data
+        fd, path = tempfile.mkstemp(suffix=".z", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            if self.tier == COMPRESSED and not self.discarded:
+                self._path, self._disk_nbytes = path, len(data)
+                self._data, self.tier = None, DISK
+                return
+        os.remove(path)
+
+    # Mengembalikan state ke bentuk mentah (prefetch sebelum undo/redo)
+    def load(self):
+        with self._lock:
+            if self.tier == RAW or self.discarded:
+                return
+        img = self.image()
+        with self._lock:
+            if self.tier != RAW and not self.discarded:
+                self._remove_file()
+                self._image, self._data, self.tier = img, None, RAW
+
+    # Melepas data state (file spill dihapus)
+    def discard(self):
+        with self._lock:
+            self.discarded = True
+            self._remove_file()
+            self._image = self._data = None
+
+    def _remove_file(self):
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path, self._disk_nbytes = None, 0
+
+
+class HistoryStore:
+    """
+    Stack undo/redo dengan batas memori. State terdekat dari citra aktif disimpan mentah;
+    bila total RAM melebihi memory_budget, state terjauh dikompresi (zlib) lalu dipindah ke
+    file sementara. Penataan ulang berjalan di thread latar sehingga push/undo tidak menunggu.
+    on_change: callback opsional (dipanggil dari thread latar) setelah pemakaian memori berubah.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, raw_states=DEFAULT_RAW_STATES,
+                 spill_dir=None, on_change=None):
+        self.memory_budget = memory_budget
+        self.raw_states = raw_states
+        self.on_change = on_change
+        self._undo = []
+        self._redo = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pcd-history")
+        self._spill_dir = tempfile.mkdtemp(prefix="pcd-history-", dir=spill_dir)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+    def __len__(self):
+        return len(self._undo)
+
+    # Apakah ada state untuk undo / redo
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    # Mencatat operasi yang mengubah before menjadi result (antarmuka bersama dengan
+    # OperationLogHistory); di sini cukup before yang disimpan
+    def commit(self, before, result, func=None, args=(), elapsed=0.0):
+        self.push(before)
+
+    # Menyimpan state sebelum operasi baru; stack redo dikosongkan
+    def push(self, img):
+        with self._lock:
+            self._undo.append(_State(img))
+            redo, self._redo = self._redo, []
+        for state in redo:
+            state.discard()
+        self._schedule()
+
+    # Undo: current masuk stack redo, state sebelumnya dikembalikan
+    def undo(self, current):
+        return self._move(self._undo, self._redo, current)
+
+    # Redo: current masuk stack undo, state berikutnya dikembalikan
+    def redo(self, current):
+        return self._move(self._redo, self._undo, current)
+
+    def _move(self, source, target, current):
+        with self._lock:
+            if not source:
+                return None
+            state = source.pop()
+            if current is not None:
+                target.append(_State(current))
+        img = state.image()
+        state.discard()
+        self._schedule()
+        return img
+
+    # Mengosongkan seluruh history
+    def clear(self):
+        with self._lock:
+            states = self._undo + self._redo
+            self._undo, self._redo = [], []
+        for state in states:
+            state.discard()
+        self._notify()
+
+    # Mengubah batas memori lalu menata ulang state
+    def set_memory_budget(self, memory_budget):
+        self.memory_budget = memory_budget
+        self._schedule()
+
+    # Total byte state di RAM
+    def memory_usage(self):
+        with self._lock:
+            states = self._undo + self._redo
+        return sum(s.ram_bytes for s in states)
+
+    # Total byte state yang dipindah ke disk
+    def disk_usage(self):
+        with self._lock:
+            states = self._undo + self._redo
+        return sum(s.disk_bytes for s in states)
+
+    # Jumlah state per tingkat penyimpanan
+    def tier_counts(self):
+        with self._lock:
+            states = self._undo + self._redo
+        counts = {RAW: 0, COMPRESSED: 0, DISK: 0}
+        for s in states:
+            counts[s.tier] += 1
+        return counts
+
+    # Menghentikan thread latar dan menghapus file spill
+    def close(self):
+        self.clear()
+        self._executor.shutdown(wait=True)
+        self._finalizer()
+
+    def _schedule(self):
+        self._executor.submit(self._rebalance)
+        self._notify()
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    # State diurutkan dari yang terdekat dengan citra aktif (puncak stack undo/redo);
+    # pada jarak yang sama state undo didahulukan
+    def _by_distance(self):
+        with self._lock:
+            undo, redo = list(self._undo), list(self._redo)
+        ranked = [(len(undo) - i, 0, s) for i, s in enumerate(undo)]
+        ranked += [(len(redo) - i, 1, s) for i, s in enumerate(redo)]
+        ranked.sort(key=lambda item: item[:2])
+        return [s for _, _, s in ranked]
+
+    # Menata tingkat penyimpanan sesuai batas memori
+    def _rebalance(self):
+        states = self._by_distance()
+        usage = sum(s.ram_bytes for s in states)
+
+        # State terdekat dikembalikan ke bentuk mentah (undo/redo berikutnya instan);
+        # ruangnya diambil dengan mengompres state yang lebih jauh
+        for i, state in enumerate(states[:self.raw_states]):
+            if state.tier == RAW:
+                continue
+            missing = state.raw_nbytes - state.ram_bytes
+            usage = self._reduce(states[i + 1:], usage, self.memory_budget - missing)
+            if usage + missing <= self.memory_budget:
+                state.load()
+                usage += missing
+
+        # Masih melebihi batas: kompres lalu pindahkan ke disk mulai dari state terjauh
+        self._reduce(states, usage, self.memory_budget)
+        self._notify()
+
+    # Mengompres lalu memindahkan ke disk state dari yang terjauh sampai usage <= limit
+    def _reduce(self, group, usage, limit):
+        for tier in (RAW, COMPRESSED):
+            for state in reversed(group):
+                if usage <= limit:
+                    return usage
+                if state.tier != tier:
+                    continue
+                before = state.ram_bytes
+                if tier == RAW:
+                    state.compress()
+                else:
+                    state.spill(self._spill_dir)
+                usage += state.ram_bytes - before
+        return usage
+
+
+# Biaya replay maksimum (detik) sebelum hasil operasi disimpan sebagai checkpoint
+DEFAULT_CHECKPOINT_COST = 0.5
+
+# Panjang rantai replay maksimum tanpa checkpoint
+DEFAULT_MAX_CHAIN = 32
+
+# Modul yang operasinya acak sehingga hasilnya tidak bisa diulang (selalu di-checkpoint).
+# Fungsi lain dengan atribut replayable = False juga selalu di-checkpoint.
+NONDETERMINISTIC_MODULES = {"noise"}
+
+
+class _StateRef:
+    """Argumen Image pada log yang merujuk ke state ke-index."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class _LogEntry:
+    """
+    Operasi yang menghasilkan satu state: func(*args) dengan argumen citra diganti _StateRef.
+    func=None berarti state sama dengan state sebelumnya. checkpoint berisi _State jika hasilnya
+    disimpan; replay_cost/depth adalah biaya dan panjang rantai untuk menghitung ulang state ini.
+    """
+
+    def __init__(self, func, args, replay_cost=0.0, depth=0, checkpoint=None):
+        self.func = func
+        self.args = args
+        self.replay_cost = replay_cost
+        self.depth = depth
+        self.checkpoint = checkpoint
+
+
+class OperationLogHistory:
+    """
+    History berbasis log operasi: setiap langkah dicatat sebagai (func, args) terhadap state
+    sebelumnya, bukan salinan citra. State N dihitung ulang dari checkpoint terdekat.
+    Checkpoint dipasang adaptif: bila biaya replay terukur melebihi checkpoint_cost detik,
+    rantai melebihi max_chain langkah, atau operasinya acak (modul noise).
+    Antarmuka sama dengan HistoryStore (commit, undo, redo, clear, memory_usage).
+    """
+
+    def __init__(self, checkpoint_cost=DEFAULT_CHECKPOINT_COST, max_chain=DEFAULT_MAX_CHAIN,
+                 on_change=None):
+        self.checkpoint_cost = checkpoint_cost
+        self.max_chain = max_chain
+        self.on_change = on_change
+        self._base = None
+        self._entries = []
+        self._pos = 0
+        self._alive = {}
+        self._recent = deque(maxlen=3)
+        self._version = 0
+        # RLock: helper _remember/_is_state dipanggil baik dengan maupun tanpa lock dipegang
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pcd-history")
+
+    def __len__(self):
+        return self._pos
+
+    @property
+    def can_undo(self):
+        return self._pos > 0
+
+    @property
+    def can_redo(self):
+        return self._pos < len(self._entries)
+
+    # Mencatat operasi func(*args) yang mengubah before menjadi result dalam elapsed detik
+    def commit(self, before, result, func=None, args=(), elapsed=0.0):
+        with self._lock:
+            self._version += 1
+            for entry in self._entries[self._pos:]:
+                self._discard(entry)
+            del self._entries[self._pos:]
+            for i in [i for i in self._alive if i > self._pos]:
+                del self._alive[i]
+
+        if self._base is None:
+            self._base = _State(before)
+            self._remember(0, before)
+        elif not self._is_state(self._pos, before):
+            # Citra aktif diganti tanpa history: state sekarang ditimpa, seperti pada HistoryStore
+            self._replace_current(before)
+
+        if func is None:
+            entry = _LogEntry(None, (), self._cost(self._pos), self._depth(self._pos) + 1)
+        else:
+            args = tuple(self._to_ref(a) for a in args)
+            deps = [a.index for a in args if isinstance(a, _StateRef)]
+            cost = elapsed + sum(self._cost(i) for i in deps)
+            depth = 1 + max((self._depth(i) for i in deps), default=0)
+            entry = _LogEntry(func, args, cost, depth)
+            deterministic = (
+                getattr(func, "__module__", None) not in NONDETERMINISTIC_MODULES
+                and getattr(func, "replayable", True)
+            )
+            if not deterministic or cost > self.checkpoint_cost or depth > self.max_chain:
+                entry.checkpoint = _State(result)
+                entry.replay_cost, entry.depth = 0.0, 0
+
+        self._entries.append(entry)
+        self._pos += 1
+        self._remember(self._pos, result)
+        self._schedule()
+
+    # Undo: kembali satu langkah (current tidak perlu disimpan, cukup dihitung ulang bila perlu)
+    def undo(self, current):
+        if not self.can_undo:
+            return None
+        self._pos -= 1
+        img = self._image(self._pos, {})
+        self._schedule()
+        return img
+
+    # Redo: maju satu langkah dengan menghitung ulang state berikutnya
+    def redo(self, current):
+        if not self.can_redo:
+            return None
+        self._pos += 1
+        img = self._image(self._pos, {})
+        self._schedule()
+        return img
+
+    # Mengosongkan seluruh history
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            if self._base is not None:
+                self._base.discard()
+            for entry in self._entries:
+                self._discard(entry)
+            self._base = None
+            self._entries = []
+            self._pos = 0
+            self._alive.clear()
+            self._recent.clear()
+        self._notify()
+
+    # Byte citra yang disimpan: checkpoint, argumen citra di luar history dan cache state terakhir
+    def memory_usage(self):
+        total = self._base.ram_bytes if self._base is not None else 0
+        for entry in list(self._entries):
+            if entry.checkpoint is not None:
+                total += entry.checkpoint.ram_bytes
+            total += sum(image_nbytes(a) for a in entry.args if isinstance(a, Image.Image))
+        with self._lock:
+            recent = list(self._recent)
+        total += sum(image_nbytes(img) for i, img in recent if i != self._pos)
+        return total
+
+    def disk_usage(self):
+        return 0
+
+    # Jumlah checkpoint (termasuk citra awal) dan operasi yang dihitung ulang
+    def checkpoint_counts(self):
+        checkpoints = sum(1 for e in self._entries if e.checkpoint is not None)
+        return {"checkpoint": checkpoints + (self._base is not None), "replay": len(self._entries) - checkpoints}
+
+    def close(self):
+        self.clear()
+        self._executor.shutdown(wait=True)
+
+    # Citra state i: dari cache, checkpoint, atau replay operasi (memo berlaku satu kali hitung).
+    # remember=False dipakai thread latar; hasilnya baru dicatat setelah dicek versinya.
+    def _image(self, i, memo, remember=True):
+        if i in memo:
+            return memo[i]
+        with self._lock:
+            ref = self._alive.get(i)
+        img = ref() if ref is not None else None
+        if img is None:
+            if i == 0:
+                img = self._base.image()
+            else:
+                entry = self._entries[i - 1]
+                if entry.checkpoint is not None:
+                    img = entry.checkpoint.image()
+                elif entry.func is None:
+                    img = self._image(i - 1, memo, remember)
+                else:
+                    args = [
+                        self._image(a.index, memo, remember) if isinstance(a, _StateRef) else a
+                        for a in entry.args
+                    ]
+                    img = entry.func(*args)
+            if remember:
+                self._remember(i, img)
+        memo[i] = img
+        return img
+
+    # _alive dan _recent juga diubah thread prefetch, jadi selalu diakses dengan lock
+    def _remember(self, i, img):
+        with self._lock:
+            self._alive[i] = weakref.ref(img)
+            self._recent.append((i, img))
+
+    def _is_state(self, i, img):
+        with self._lock:
+            ref = self._alive.get(i)
+        return ref is not None and ref() is img
+
+    # Argumen Image yang merupakan state history diganti referensi; citra lain disimpan apa adanya
+    def _to_ref(self, arg):
+        if isinstance(arg, Image.Image):
+            with self._lock:
+                alive = sorted(self._alive.items(), reverse=True)
+            for i, ref in alive:
+                if i <= self._pos and ref() is arg:
+                    return _StateRef(i)
+        return arg
+
+    def _replace_current(self, img):
+        self._version += 1
+        if self._pos == 0:
+            self._base.discard()
+            self._base = _State(img)
+        else:
+            self._discard(self._entries[self._pos - 1])
+            self._entries[self._pos - 1] = _LogEntry(None, (), checkpoint=_State(img))
+        self._remember(self._pos, img)
+
+    def _cost(self, i):
+        return self._entries[i - 1].replay_cost if i > 0 else 0.0
+
+    def _depth(self, i):
+        return self._entries[i - 1].depth if i > 0 else 0
+
+    def _discard(self, entry):
+        if entry.checkpoint is not None:
+            entry.checkpoint.discard()
+
+    def _schedule(self):
+        self._executor.submit(self._compress_checkpoints, self._pos)
+        self._executor.submit(self._prefetch, self._pos, self._version)
+        self._notify()
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    # Checkpoint yang menjadi titik awal replay state pos dan pos-1 disimpan mentah
+    # (undo berikutnya cepat); checkpoint lain dikompres
+    def _compress_checkpoints(self, pos):
+        entries = list(self._entries)
+        states = [self._base] + [e.checkpoint for e in entries]
+        keep = set()
+        for target in (pos, pos - 1):
+            for i in range(min(target, len(entries)), -1, -1):
+                if states[i] is not None:
+                    keep.add(i)
+                    break
+        for i, state in enumerate(states):
+            if state is None:
+                continue
+            if i in keep:
+                state.load()
+            else:
+                state.compress()
+        self._notify()
+
+    # Menghitung state tetangga (pos-1 dan pos+1) di latar agar undo/redo berikutnya instan.
+    # Hasil dibuang jika log berubah selama perhitungan.
+    def _prefetch(self, pos, version):
+        for i in (pos - 1, pos + 1):
+            if version != self._version or not 0 <= i <= len(self._entries):
+                continue
+            memo = {}
+            try:
+                img = self._image(i, memo, remember=False)
+            except Exception:
+                return
+            with self._lock:
+                if version != self._version:
+                    return
+                for j, state_img in memo.items():
+                    if not self._is_state(j, state_img):
+                        self._alive[j] = weakref.ref(state_img)
+                self._remember(i, img)
+        self._notify()
+
+
+# Format ukuran byte untuk ditampilkan (mis. "12.3 MB")
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} GB"
@@ -0,0 +1,182 @@
+import numpy as np
+from PIL import Image, ImageEnhance, ImageStat
+
+# Mode citra 8-bit per band yang bisa diproses dengan tabel 256 entri per band
+LUT_MODES = ("L", "LA", "RGB", "RGBA")
+
+_IDENTITY = np.arange(256, dtype=np.uint8)
+
+
+# Citra 1 x 256 dengan setiap band berisi nilai 0..255 (untuk menurunkan tabel dari operasi PIL)
+def _gradient(mode):
+    band = Image.fromarray(_IDENTITY.reshape(1, 256))
+    if mode == "L":
+        return band
+    return Image.merge(mode, [band] * len(mode))
+
+# Tabel (bands, 256) dari hasil operasi pada citra gradien
+def _tables_from_image(img):
+    arr = np.asarray(img, dtype=np.uint8)
+    return arr.reshape(256, -1).T.copy()
+
+# Menerapkan tabel (bands, 256) ke citra dengan satu Image.point
+def apply_tables(img, tables):
+    return img.point(np.ascontiguousarray(tables, dtype=np.uint8).ravel().tolist())
+
+# Komposisi tabel: hasilnya sama dengan menerapkan first lalu second
+def compose(first, second):
+    return np.take_along_axis(second, first.astype(np.intp), axis=1)
+
+# Tabel identitas untuk mode tertentu
+def identity_tables(mode):
+    return np.tile(_IDENTITY, (len(mode), 1))
+
+
+class PointOp:
+    """
+    Satu operasi per piksel. convert: mode yang diminta sebelum tabel diterapkan
+    (mis. "L" untuk threshold). build(mode, mean) mengembalikan tabel (bands, 256);
+    needs_mean=True jika tabel bergantung pada rata-rata grayscale citra masukan (contrast).
+    fallback: implementasi biasa untuk mode di luar LUT_MODES.
+    """
+
+    def __init__(self, name, build, convert=None, needs_mean=False, fallback=None):
+        self.name = name
+        self.build = build
+        self.convert = convert
+        self.needs_mean = needs_mean
+        self.fallback = fallback
+
+
+# Negatif: 255 - x pada semua band
+def negative_op(fallback=None):
+    return PointOp(
+        "negative",
+        lambda mode, mean: identity_tables(mode) ^ 255,
+        fallback=fallback
+    )
+
+# Aritmatika dengan konstanta (add, sub, mul, div), dihitung tanpa overflow lalu di-clip
+def arithmetic_op(op="add", value=50, fallback=None):
+    def build(mode, mean):
+        x = np.arange(256, dtype=np.float64)
+        if op == "add":
+            x = x + value
+        elif op == "sub":
+            x = x - value
+        elif op == "mul":
+            x = x * value
+        elif op == "div":
+            x = x / value
+        table = np.clip(x, 0, 255).astype(np.uint8)
+        return np.tile(table, (len(mode), 1))
+    return PointOp(f"arithmetic_{op}", build, fallback=fallback)
+
+# Threshold pada grayscale: 255 jika p > t, selain itu 0
+def threshold_op(t=128):
+    return PointOp(
+        "threshold",
+        lambda mode, mean: np.where(_IDENTITY > t, 255, 0).astype(np.uint8)[None, :],
+        convert="L"
+    )
+
+# NOT pada grayscale
+def boolean_not_op():
+    return PointOp(
+        "boolean_not",
+        lambda mode, mean: (_IDENTITY ^ 255)[None, :],
+        convert="L"
+    )
+
+# Brightness: tabel diturunkan dari ImageEnhance.Brightness sehingga hasilnya identik
+def brightness_op(factor=1.0, fallback=None):
+    def build(mode, mean):
+        return _tables_from_image(ImageEnhance.Brightness(_gradient(mode)).enhance(factor))
+    return PointOp("brightness", build, fallback=fallback)
+
+# Contrast: blend dengan citra abu-abu bernilai rata-rata grayscale masukan (rumus ImageEnhance.Contrast)
+def contrast_op(factor=1.0, fallback=None):
+    def build(mode, mean):
+        gradient = _gradient(mode)
+        degenerate = Image.new("L", gradient.size, mean)
+        if mode != "L":
+            degenerate = degenerate.convert(mode)
+        if "A" in mode:
+            degenerate.putalpha(gradient.getchannel("A"))
+        return _tables_from_image(Image.blend(degenerate, gradient, factor))
+    return PointOp("contrast", build, needs_mean=True, fallback=fallback)
+
+
+# Rata-rata grayscale (dibulatkan seperti ImageEnhance.Contrast) dari img setelah tabel diterapkan.
+# Untuk mode L cukup dari histogram; mode lain perlu konversi ke L.
+def _mean_after(img, tables):
+    if img.mode == "L":
+        hist = np.asarray(img.histogram(), dtype=np.float64)
+        mapped = np.bincount(tables[0], weights=hist, minlength=256)
+        mean = (mapped * np.arange(256)).sum() / max(hist.sum(), 1)
+    else:
+        current = apply_tables(img, tables) if not _is_identity(tables) else img
+        mean = ImageStat.Stat(current.convert("L")).mean[0]
+    return int(mean + 0.5)
+
+def _is_identity(tables):
+    return bool(np.all(tables == _IDENTITY))
+
+
+# Menjalankan rangkaian PointOp pada img. Operasi berurutan digabung menjadi satu tabel per band
+# dan diterapkan dengan satu Image.point; citra hanya dimaterialisasi saat mode harus dikonversi
+# (mis. RGB -> L untuk threshold) atau saat operasi tidak mendukung mode citra.
+def apply_ops(img, ops):
+    tables = identity_tables(img.mode) if img.mode in LUT_MODES else None
+    for op in ops:
+        if op.convert is not None and img.mode != op.convert:
+            img = _materialize(img, tables).convert(op.convert)
+            tables = identity_tables(img.mode)
+        if tables is None:
+            if op.fallback is None:
+                raise ValueError(f"Operasi {op.name} tidak mendukung mode {img.mode}")
+            img = op.fallback(img)
+            tables = identity_tables(img.mode) if img.mode in LUT_MODES else None
+            continue
+        mean = _mean_after(img, tables) if op.needs_mean else None
+        tables = compose(tables, op.build(img.mode, mean))
+    return apply_tables(img, tables) if tables is not None else img
+
+def _materialize(img, tables):
+    if tables is None or _is_identity(tables):
+        return img
+    return apply_tables(img, tables)
+
+
+class PointChain:
+    """
+    Rangkaian operasi per piksel yang dieksekusi sebagai satu tabel, mis.
+    PointChain().brightness(1.2).negative().threshold(100).apply(img).
+    """
+
+    def __init__(self, ops=None):
+        self.ops = list(ops or [])
+
+    def then(self, op):
+        return PointChain(self.ops + [op])
+
+    def negative(self):
+        return self.then(negative_op())
+
+    def arithmetic(self, op="add", value=50):
+        return self.then(arithmetic_op(op, value))
+
+    def threshold(self, t=128):
+        return self.then(threshold_op(t))
+
+    def boolean_not(self):
+        return self.then(boolean_not_op())
+
+    def brightness(self, factor=1.0):
+        return self.then(brightness_op(factor))
+
+    def contrast(self, factor=1.0):
+        return self.then(contrast_op(factor))
+
+    def apply(self, img):
+        return apply_ops(img, self.ops)
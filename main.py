@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 from PIL import Image, ImageTk
-import threading
 import numpy as np
 import webbrowser
 import os
@@ -55,7 +54,48 @@ from segmentation import (
     watermark_image
 )
 
+from disk_cache import DiskCache
+from history import HistoryStore, OperationLogHistory, format_bytes
+from pyramid import ImagePyramid
+from resampling import open_draft
+from result_cache import ResultCache
+from scheduler import Scheduler
+from viewport import Viewport
+
+# Membuka file citra dan langsung men-decode seluruh isinya (dijalankan di worker).
+# Dengan disk_cache, citra ditandai berasal dari file ini agar hasil operasinya bisa
+# dibaca ulang dari cache disk pada sesi berikutnya.
+def load_image(path, disk_cache=None):
+    img = Image.open(path)
+    img.load()
+    if disk_cache is not None:
+        disk_cache.register_source(img, path)
+    return img
+
+# Argumen dua panggilan sama; citra dibandingkan berdasarkan identitas objek
+def same_args(a, b):
+    if len(a) != len(b):
+        return False
+    return all(x is y or (not isinstance(x, Image.Image) and x == y) for x, y in zip(a, b))
+
 class AplikasiPCD:
+    # Mode history: "snapshot" (salinan citra, dengan batas memori) atau
+    # "oplog" (log operasi dengan checkpoint, citra dihitung ulang saat undo/redo)
+    HISTORY_MODE = "snapshot"
+
+    # Batas memori history undo/redo mode snapshot (byte)
+    HISTORY_MEMORY_BUDGET = 512 * 1024 * 1024
+
+    # Batas memori cache hasil operasi (byte)
+    RESULT_CACHE_BUDGET = 256 * 1024 * 1024
+
+    # Cache hasil operasi di disk (bertahan antar sesi, lihat disk_cache.py) dan batas ukurannya
+    DISK_CACHE_ENABLED = False
+    DISK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+    # Jeda (ms) tanpa event resize/pan sebelum tampilan dirender ulang dengan kualitas penuh
+    RESIZE_SETTLE_MS = 150
+
     # Inisialisasi aplikasi dan komponen utama GUI
     def __init__(self, root):
         self.root = root
@@ -69,11 +109,17 @@ class AplikasiPCD:
         self.current_image = None
         self.current_image_path = None
         self.original_image = None
-        self.display_image = None
 
-        # Stack Undo / Redo
-        self.history_stack = []
-        self.redo_stack = []
+        # History Undo / Redo
+        on_history_change = lambda: self.root.after(0, self.update_history_label)
+        if self.HISTORY_MODE == "oplog":
+            self.history = OperationLogHistory(on_change=on_history_change)
+        else:
+            # State lama dikompres / dipindah ke disk bila melebihi batas memori
+            self.history = HistoryStore(
+                memory_budget=self.HISTORY_MEMORY_BUDGET,
+                on_change=on_history_change
+            )
         self.zoom_factor = 1.0
 
         # Slider aktif
@@ -86,6 +132,17 @@ class AplikasiPCD:
         self.slider_registry = {}
         self._is_reseting_sliders = False
 
+        # Penjadwal job: channel "image" untuk hasil resolusi penuh, "preview" untuk slider.
+        # Job baru menggantikan job lama di channel yang sama; hasil usang dibuang.
+        self.scheduler = Scheduler(workers=2, dispatch=lambda fn: self.root.after(0, fn))
+        self._last_preview = None
+
+        # Cache hasil operasi: operasi dan parameter yang sama pada citra yang sama
+        # (mis. Sobel -> Prewitt -> Sobel, slider kembali ke nilai sebelumnya) tidak dihitung ulang
+        self.disk_cache = DiskCache(max_bytes=self.DISK_CACHE_MAX_BYTES) if self.DISK_CACHE_ENABLED else None
+        self.result_cache = ResultCache(memory_budget=self.RESULT_CACHE_BUDGET, disk=self.disk_cache)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
+
         # Flag tampilan About
         self.is_showing_about = False
 
@@ -190,6 +247,29 @@ class AplikasiPCD:
         )
         self.image_label.place(relx=0.5, rely=0.5, anchor="center")
 
+        # Tampilan citra: hanya area yang terlihat yang di-resample, PhotoImage dipakai ulang.
+        # Saat zoom in, citra digeser dengan drag mouse.
+        self.viewport = Viewport(self.image_label)
+        self._drag_start = None
+
+        # Render saat window di-resize: satu render cepat per siklus idle selama drag,
+        # lalu satu render LANCZOS setelah ukuran tidak berubah lagi
+        self._root_size = None
+        self._draft_render_job = None
+        self._final_render_job = None
+        self.image_label.bind("<ButtonPress-1>", self.start_pan)
+        self.image_label.bind("<B1-Motion>", self.on_pan)
+
+        # Label pemakaian memori history
+        self.history_label = tk.Label(
+            self.image_frame,
+            bg="#1a1a1a",
+            fg="#7F8C8D",
+            font=self.custom_font_small,
+            text=""
+        )
+        self.history_label.place(relx=1.0, rely=1.0, anchor="se", x=-8, y=-4)
+
         # Footer
         tk.Label(
             root,
@@ -204,6 +284,17 @@ class AplikasiPCD:
         # Event resize window
         self.root.bind("<Configure>", self.on_resize)
 
+    # Citra aktif. Mengganti citra aktif juga mengganti piramida tampilannya
+    # (levelnya baru dibuat saat tampilan, zoom atau preview memerlukannya)
+    @property
+    def current_image(self):
+        return self._current_image
+
+    @current_image.setter
+    def current_image(self, img):
+        self._current_image = img
+        self.pyramid = ImagePyramid(img) if img is not None else None
+
     # Mendaftarkan slider agar bisa direset
     def register_slider(self, name, slider_widget, default_value):
         self.slider_registry[name] = {"slider": slider_widget, "default": default_value}
@@ -391,24 +482,78 @@ class AplikasiPCD:
                 bd=0
             ).pack(pady=2, padx=5)
 
-    # Menjalankan operasi citra di thread terpisah
+    # Menjalankan operasi citra lewat scheduler; hanya hasil terbaru yang diterapkan
+    # dan masuk history
     def update_image_async(self, func, *args):
+        self.scheduler.submit(
+            self.result_cache.timed_call, func, *args,
+            channel="image",
+            on_done=lambda done: self.commit_result(done[0], func, args, done[1]),
+            on_error=lambda e: messagebox.showerror("Error", str(e))
+        )
+
+    # Menerapkan hasil job sebagai current_image dan mencatat langkahnya ke history
+    # (func/args/elapsed dipakai oleh history mode oplog)
+    def commit_result(self, img, func=None, args=(), elapsed=0.0):
         if self.current_image:
-            self.history_stack.append(self.current_image.copy())
-            self.redo_stack.clear()
+            self.history.commit(self.current_image, img, func, args, elapsed)
+        self.update_image(img)
+
+    # Membuat citra proxy seukuran frame tampilan untuk preview slider.
+    # Citra yang lebih kecil dari frame dipakai apa adanya; untuk current_image proxy dibuat
+    # dari level piramida terdekat di atas ukuran frame.
+    def make_preview_proxy(self, img):
+        frame_w = max(self.image_frame.winfo_width(), 100)
+        frame_h = max(self.image_frame.winfo_height(), 100)
+        if img.width <= frame_w and img.height <= frame_h:
+            return img
+        source = img
+        if img is self.current_image:
+            source = self.pyramid.for_size((frame_w, frame_h))[0]
+        proxy = source.copy()
+        proxy.thumbnail((frame_w, frame_h), Image.BILINEAR, reducing_gap=2.0)
+        return proxy
+
+    # Menjalankan operasi (biasanya pada proxy) dan hanya menampilkannya
+    # (current_image dan history tidak berubah)
+    def preview_image_async(self, func, *args):
+        def show_preview(done):
+            self._last_preview = (func, args) + done
+            self.render_image(done[0])
+        self.scheduler.submit(
+            self.result_cache.timed_call, func, *args,
+            channel="preview",
+            on_done=show_preview
+        )
 
-        def task():
-            try:
-                result = func(*args)
-                self.root.after(0, lambda: self.update_image(result))
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", str(e)))
-        threading.Thread(target=task, daemon=True).start()
+    # Menjalankan parameter terakhir slider pada citra resolusi penuh dan memasukkannya
+    # ke history. Jika preview terakhir sudah dihitung dengan argumen yang sama, hasilnya dipakai.
+    def commit_image_async(self, func, *args):
+        self.scheduler.cancel("preview")
+        last, self._last_preview = self._last_preview, None
+        if last is not None and last[0] is func and same_args(last[1], args):
+            self.scheduler.cancel("image")
+            self.commit_result(last[2], func, args, last[3])
+        else:
+            self.update_image_async(func, *args)
+
+    # Membatalkan semua job dan preview yang belum diterapkan
+    def cancel_pending_jobs(self):
+        self.scheduler.cancel()
+        self._last_preview = None
+
+    # Menutup aplikasi: job dihentikan, history dibersihkan dan index cache disk disimpan
+    def on_exit(self):
+        self.scheduler.shutdown()
+        self.history.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+        self.root.destroy()
 
     # Menampilkan submenu File
     def menu_file(self):
         ops = ["Open", "Save", "Save As", "Exit"]
-        cmds = [self.open_image, self.save_image, self.save_as_image, self.root.quit]
+        cmds = [self.open_image, self.save_image, self.save_as_image, self.on_exit]
         self.add_submenu_left(ops, cmds, show_undo=False, title="File")
 
     # Menampilkan submenu Basic Operations
@@ -495,11 +640,13 @@ class AplikasiPCD:
         if not self.current_image:
             messagebox.showwarning("Peringatan", "Buka gambar terlebih dahulu.")
             return
+        # Semua operator di panel ini memakai citra yang sama agar gradien bisa dipakai ulang
+        source_image = self.current_image
         ops = ["Sobel", "Prewitt", "Robert"]
         cmds = [
-            lambda: self.update_image_async(sobel_edge, self.current_image),
-            lambda: self.update_image_async(prewitt_edge, self.current_image),
-            lambda: self.update_image_async(roberts_edge, self.current_image)
+            lambda: self.update_image_async(sobel_edge, source_image),
+            lambda: self.update_image_async(prewitt_edge, source_image),
+            lambda: self.update_image_async(roberts_edge, source_image)
         ]
         self.add_submenu_left2(ops, cmds, title="1'st Gradient")
 
@@ -508,29 +655,68 @@ class AplikasiPCD:
         if not self.current_image:
             messagebox.showwarning("Peringatan", "Buka gambar terlebih dahulu.")
             return
+        source_image = self.current_image
         ops = ["Laplacian", "LoG", "Canny"]
         cmds = [
-            lambda: self.update_image_async(laplacian_edge, self.current_image),
-            lambda: self.update_image_async(log_edge, self.current_image),
-            lambda: self.update_image_async(canny_edge, self.current_image)
+            lambda: self.update_image_async(laplacian_edge, source_image),
+            lambda: self.update_image_async(log_edge, source_image),
+            lambda: self.update_image_async(
+                canny_edge, source_image, low_slider.get(), high_slider.get()
+            )
         ]
         self.add_submenu_left2(ops, cmds, title="2'nd Gradient")
 
+        # Slider threshold Canny; hasil NMS di-cache sehingga hanya hysteresis yang diulang
+        canny_frame = tk.LabelFrame(
+            self.left_frame2,
+            text="Canny Threshold",
+            bg="#1C2833",
+            fg="#ECF0F1",
+            font=self.custom_font_small,
+            padx=5,
+            pady=5
+        )
+        canny_frame.pack(fill="x", pady=(10, 5))
+
+        # Geser: preview resolusi penuh tanpa history; lepas: hasil di-commit
+        def on_slide(val):
+            if self._is_reseting_sliders:
+                return
+            self.preview_image_async(
+                canny_edge, source_image, low_slider.get(), high_slider.get()
+            )
+
+        def on_release(event):
+            self.commit_image_async(
+                canny_edge, source_image, low_slider.get(), high_slider.get()
+            )
+
+        sliders = []
+        for name, default in (("Low", 50), ("High", 150)):
+            tk.Label(canny_frame, text=name, font=self.custom_font_small, bg="#1C2833", fg="#ECF0F1").pack()
+            s = tk.Scale(
+                canny_frame,
+                from_=0,
+                to=500,
+                orient="horizontal",
+                bg="#1C2833",
+                fg="#ECF0F1",
+                length=140
+            )
+            s.set(default)
+            s.configure(command=on_slide)
+            s.bind("<ButtonRelease-1>", on_release)
+            s.pack()
+            self.register_slider(f"Canny {name}", s, default)
+            sliders.append(s)
+        low_slider, high_slider = sliders
+
     # Menjalankan Compass Edge Detection
     def apply_compass(self):
         self.clear_left_submenu2()
         self.left_frame2.pack_forget()
 
-        max_dim = 800
-        img = self.current_image.copy()
-        w, h = img.size
-        if max(w, h) > max_dim:
-            ratio = max_dim / max(w, h)
-            img_small = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
-        else:
-            img_small = img
-
-        self.update_image_async(compass_edge, img_small)
+        self.update_image_async(compass_edge, self.current_image)
 
     # Menampilkan submenu Segmentation
     def menu_segmentation(self):
@@ -574,9 +760,12 @@ class AplikasiPCD:
         if not self.current_image:
             return
 
-        original_image = self.current_image.copy()
+        original_image = self.current_image
+        # Slider digeser: operasi dijalankan pada proxy; slider dilepas: resolusi penuh
+        proxy_image = self.make_preview_proxy(original_image)
+        proxy_scale = proxy_image.width / original_image.width
 
-        def create_slider(name, from_, to_, default, filter_func):
+        def create_slider(name, from_, to_, default, filter_func, scale_radius=False):
             frame = tk.Frame(self.left_frame2, bg="#1C2833")
             frame.pack(pady=10, fill="x")
             tk.Label(frame, text=name, font=self.custom_font_small, bg="#1C2833", fg="#ECF0F1").pack()
@@ -584,12 +773,20 @@ class AplikasiPCD:
             def on_slide(val):
                 val = int(val)
                 if val == 0:
+                    self.scheduler.cancel("preview")
+                    self.render_image(original_image)
+                else:
+                    # Radius blur diperkecil sesuai skala proxy agar preview setara
+                    preview_val = val * proxy_scale if scale_radius else val
+                    self.preview_image_async(filter_func, proxy_image, preview_val)
+
+            def on_release(event):
+                val = int(s.get())
+                if val == 0:
+                    self.cancel_pending_jobs()
                     self.update_image(original_image)
                 else:
-                    try:
-                        self.update_image_async(filter_func, original_image, val)
-                    except TypeError:
-                        self.update_image_async(filter_func, original_image)
+                    self.commit_image_async(filter_func, original_image, val)
 
             s = tk.Scale(
                 frame,
@@ -603,11 +800,12 @@ class AplikasiPCD:
             )
             s.set(default)
             s.pack()
+            s.bind("<ButtonRelease-1>", on_release)
 
             self.register_slider(name, s, default)
             return s
 
-        create_slider("Blur", 0, 10, 0, blur_image)
+        create_slider("Blur", 0, 10, 0, blur_image, scale_radius=True)
         create_slider("Sharpen", 0, 5, 0, sharpen_image)
         create_slider("Edge Detect", 0, 255, 0, edge_detect_image)
 
@@ -640,11 +838,15 @@ class AplikasiPCD:
             pady=10
         ).pack(side="top", fill="x")
 
-        original_image = self.current_image.copy()
+        original_image = self.current_image
+        # Slider digeser: operasi dijalankan pada proxy; slider dilepas: resolusi penuh
+        proxy_image = self.make_preview_proxy(original_image)
 
         def on_slide(val):
-            factor = float(val)
-            self.update_image_async(func, original_image, factor)
+            self.preview_image_async(func, proxy_image, float(val))
+
+        def on_release(event):
+            self.commit_image_async(func, original_image, float(slider.get()))
 
         slider = tk.Scale(
             self.left_frame2,
@@ -659,6 +861,7 @@ class AplikasiPCD:
         )
         slider.set(default)
         slider.pack(pady=20)
+        slider.bind("<ButtonRelease-1>", on_release)
 
         self.active_slider = slider
         self.active_slider_func = func
@@ -696,10 +899,9 @@ class AplikasiPCD:
 
     # Undo ke state gambar sebelumnya
     def undo_image(self):
-        if self.history_stack:
-            if self.current_image:
-                self.redo_stack.append(self.current_image.copy())
-            self.current_image = self.history_stack.pop()
+        self.cancel_pending_jobs()
+        if self.history.can_undo:
+            self.current_image = self.history.undo(self.current_image)
             self.zoom_factor = 1.0
             self.display_image_fit()
             self.reset_all_sliders_to_default()
@@ -708,10 +910,9 @@ class AplikasiPCD:
 
     # Redo ke state gambar berikutnya
     def redo_image(self):
-        if self.redo_stack:
-            if self.current_image:
-                self.history_stack.append(self.current_image.copy())
-            self.current_image = self.redo_stack.pop()
+        self.cancel_pending_jobs()
+        if self.history.can_redo:
+            self.current_image = self.history.redo(self.current_image)
             self.zoom_factor = 1.0
             self.display_image_fit()
             self.reset_all_sliders_to_default()
@@ -724,10 +925,13 @@ class AplikasiPCD:
             messagebox.showwarning("Peringatan", "Belum ada gambar untuk di-reset.")
             return
 
+        self.cancel_pending_jobs()
         self.current_image = self.original_image.copy()
-        self.history_stack.clear()
-        self.redo_stack.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.alias(self.original_image, self.current_image)
+        self.history.clear()
         self.zoom_factor = 1.0
+        self.viewport.reset()
 
         self.display_image_fit()
         self.reset_all_sliders_to_default()
@@ -736,14 +940,34 @@ class AplikasiPCD:
     def open_image(self):
         path = filedialog.askopenfilename(filetypes=[("Image Files", "*.jpg;*.png;*.bmp")])
         if path:
-            img = Image.open(path)
-            self.original_image = img.copy()
-            self.current_image = img
-            self.current_image_path = path
-            self.history_stack.clear()
-            self.redo_stack.clear()
+            self.cancel_pending_jobs()
+            self.original_image = None
+            self.current_image = None
+            self.history.clear()
             self.zoom_factor = 1.0
-            self.display_image_fit()
+            self.viewport.reset()
+
+            # JPEG: tampilkan dulu versi draft seukuran frame, citra penuh di-decode di worker
+            frame_size = (max(self.image_frame.winfo_width(), 100), max(self.image_frame.winfo_height(), 100))
+            draft = open_draft(path, frame_size)
+            if draft is not None:
+                self.render_image(draft)
+
+            self.scheduler.submit(
+                load_image, path, self.disk_cache,
+                channel="image",
+                on_done=lambda img: self.set_opened_image(img, path),
+                on_error=lambda e: messagebox.showerror("Error", str(e))
+            )
+
+    # Menjadikan citra yang selesai dimuat sebagai citra asli dan citra aktif
+    def set_opened_image(self, img, path):
+        self.original_image = img.copy()
+        if self.disk_cache is not None:
+            self.disk_cache.alias(img, self.original_image)
+        self.current_image = img
+        self.current_image_path = path
+        self.display_image_fit()
 
     # Simpan gambar ke folder Downloads
     def save_image(self):
@@ -788,31 +1012,88 @@ class AplikasiPCD:
 
     # Update current_image dan refresh tampilan
     def update_image(self, img):
-        self.current_image = img.copy()
+        self.current_image = img
         self.display_image_fit()
 
     # Menyesuaikan ukuran gambar dengan frame tampilan
-    def display_image_fit(self):
+    def display_image_fit(self, resample=Image.LANCZOS):
         if self.is_showing_about:
             return
         if not self.current_image:
             return
+        self.render_image(self.current_image, resample)
 
+    # Menampilkan citra (current_image atau preview) sesuai ukuran frame dan zoom_factor
+    # (lihat viewport.py: crop area yang terlihat, resample, paste ke PhotoImage yang sama).
+    # current_image dibaca dari level piramidanya yang sesuai dengan skala tampilan.
+    def render_image(self, img, resample=Image.LANCZOS):
+        if self.is_showing_about:
+            return
         frame_w = self.image_frame.winfo_width()
         frame_h = self.image_frame.winfo_height()
         if frame_w > 50 and frame_h > 50:
-            img_w, img_h = self.current_image.size
-            ratio = min(frame_w / img_w, frame_h / img_h) * self.zoom_factor * 0.95
-            new_w, new_h = max(1, int(img_w * ratio)), max(1, int(img_h * ratio))
-            img_resized = self.current_image.resize((new_w, new_h), Image.LANCZOS)
-            self.display_image = ImageTk.PhotoImage(img_resized)
-            self.image_label.config(image=self.display_image, text="")
+            pyramid = self.pyramid if img is self.current_image else None
+            self.viewport.render(img, (frame_w, frame_h), self.zoom_factor, resample, pyramid)
             self.image_label.place(relx=0.5, rely=0.5, anchor="center")
 
-    # Handler ketika window di-resize
+    # Mulai menggeser tampilan (drag mouse pada citra)
+    def start_pan(self, event):
+        self._drag_start = (event.x_root, event.y_root)
+
+    # Menggeser tampilan mengikuti mouse; hanya berarti saat citra lebih besar dari frame
+    def on_pan(self, event):
+        if self._drag_start is None or not self.current_image or self.zoom_factor <= 1.0:
+            return
+        dx = event.x_root - self._drag_start[0]
+        dy = event.y_root - self._drag_start[1]
+        self._drag_start = (event.x_root, event.y_root)
+        self.viewport.pan(dx, dy)
+        self.schedule_render()
+
+    # Menampilkan jumlah langkah dan pemakaian memori history, serta statistik cache hasil
+    def update_history_label(self):
+        ram = self.history.memory_usage()
+        disk = self.history.disk_usage()
+        text = f"History {len(self.history)} langkah | RAM {format_bytes(ram)}"
+        if disk:
+            text += f" | Disk {format_bytes(disk)}"
+        stats = self.result_cache.stats()
+        hits = stats["hits"] + stats["disk_hits"]
+        if hits or stats["misses"]:
+            text += f" | Cache {hits}/{hits + stats['misses']} hit, {format_bytes(stats['bytes'])}"
+        self.history_label.config(text=text)
+
+    # Handler ketika window di-resize. <Configure> yang di-bind ke root juga diterima dari
+    # semua widget anak, jadi hanya event milik root dengan ukuran baru yang diproses.
     def on_resize(self, event):
+        if event.widget is not self.root:
+            return
+        size = (event.width, event.height)
+        if size == self._root_size:
+            return
+        self._root_size = size
         if self.current_image and not self.is_showing_about:
-            self.display_image_fit()
+            self.schedule_render()
+
+    # Menggabungkan permintaan render beruntun (resize window, pan): paling banyak satu render
+    # cepat (BILINEAR) per siklus idle, lalu satu render LANCZOS setelah RESIZE_SETTLE_MS
+    # tanpa permintaan baru
+    def schedule_render(self):
+        if self._draft_render_job is None:
+            self._draft_render_job = self.root.after_idle(self.render_draft)
+        if self._final_render_job is not None:
+            self.root.after_cancel(self._final_render_job)
+        self._final_render_job = self.root.after(self.RESIZE_SETTLE_MS, self.render_final)
+
+    # Render cepat selama resize/pan masih berlangsung
+    def render_draft(self):
+        self._draft_render_job = None
+        self.display_image_fit(Image.BILINEAR)
+
+    # Render kualitas penuh setelah ukuran/posisi tidak berubah lagi
+    def render_final(self):
+        self._final_render_job = None
+        self.display_image_fit()
 
     # Terapkan operasi negatif
     def apply_negative(self):
@@ -940,7 +1221,7 @@ class AplikasiPCD:
     # Terapkan convolution dengan kernel pilihan user
     def apply_convolution(self):
         kernels = {
-            "blur": np.array([[1, 1, 1], [1, 1, 1], [1, 1, 1]], dtype=np.float32) / 9.0,
+            "blur": (np.ones(3, dtype=np.float32) / 3.0, np.ones(3, dtype=np.float32) / 3.0),
             "sharpen": np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32),
             "edge": np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.float32)
         }
@@ -980,8 +1261,7 @@ class AplikasiPCD:
     # Zoom in / out dengan mengubah faktor zoom
     def apply_zooming(self, direction="in"):
         if self.current_image:
-            self.history_stack.append(self.current_image.copy())
-            self.redo_stack.clear()
+            self.history.commit(self.current_image, self.current_image)
             if direction == "in":
                 self.zoom_factor *= 1.2
             else:
@@ -1083,15 +1363,23 @@ class AplikasiPCD:
         )
         freq_frame.pack(fill="x", pady=(5, 10))
 
-        freq_ops = ["ILPF", "BLPF"]
-        freq_cmds = [
-            lambda: self.update_image_async(smoothing, self.current_image, "ilpf"),
-            lambda: self.update_image_async(smoothing, self.current_image, "blpf")
-        ]
-        for i, op in enumerate(freq_ops):
+        # Filter frekuensi memakai citra saat panel dibuka agar spektrum FFT bisa dipakai ulang
+        source_image = self.current_image
+        freq_method = tk.StringVar(value="ilpf")
+
+        freq_color = tk.BooleanVar(value=False)
+
+        def apply_freq(method=None, preview=False):
+            if method is not None:
+                freq_method.set(method)
+            run = self.preview_image_async if preview else self.commit_image_async
+            run(smoothing, source_image, freq_method.get(), cutoff_slider.get(), freq_color.get())
+
+        freq_ops = {"ILPF": "ilpf", "BLPF": "blpf"}
+        for op_name, mode in freq_ops.items():
             tk.Button(
                 freq_frame,
-                text=op,
+                text=op_name,
                 font=self.custom_font_small,
                 bg="#5CA0BF",
                 fg="#ECF0F1",
@@ -1100,11 +1388,55 @@ class AplikasiPCD:
                 relief="flat",
                 width=16,
                 pady=6,
-                command=freq_cmds[i],
+                command=lambda m=mode: apply_freq(m),
                 cursor="hand2",
                 bd=0
             ).pack(pady=2, padx=5)
 
+        cutoff_slider = self.create_cutoff_slider(freq_frame, "Cutoff LPF", 80, apply_freq)
+        self.create_color_toggle(freq_frame, freq_color, apply_freq)
+
+    # Slider cutoff filter frekuensi; spektrum dan mask di-cache sehingga tiap geseran
+    # hanya perkalian mask dan inverse FFT. Geseran ditampilkan sebagai preview,
+    # hasil masuk history saat slider dilepas.
+    def create_cutoff_slider(self, parent, name, default, apply_func):
+        tk.Label(parent, text=name, font=self.custom_font_small, bg="#1C2833", fg="#ECF0F1").pack()
+
+        def on_slide(val):
+            if not self._is_reseting_sliders:
+                apply_func(preview=True)
+
+        s = tk.Scale(
+            parent,
+            from_=1,
+            to=300,
+            orient="horizontal",
+            bg="#1C2833",
+            fg="#ECF0F1",
+            length=140
+        )
+        s.set(default)
+        s.configure(command=on_slide)
+        s.bind("<ButtonRelease-1>", lambda event: apply_func())
+        s.pack()
+        self.register_slider(name, s, default)
+        return s
+
+    # Checkbox mode warna untuk filter frekuensi (RGB per channel, bukan grayscale)
+    def create_color_toggle(self, parent, variable, apply_func):
+        tk.Checkbutton(
+            parent,
+            text="Warna (RGB)",
+            variable=variable,
+            command=apply_func,
+            font=self.custom_font_small,
+            bg="#1C2833",
+            fg="#ECF0F1",
+            selectcolor="#2C3E50",
+            activebackground="#1C2833",
+            activeforeground="#ffffff"
+        ).pack(pady=(5, 0))
+
     # Submenu sharpening (spatial dan frequency)
     def show_sharpening(self):
         if not self.current_image:
@@ -1123,7 +1455,7 @@ class AplikasiPCD:
             pady=10
         ).pack(side="top", fill="x")
 
-        original_image = self.current_image.copy()
+        original_image = self.current_image
 
         spatial_frame = tk.LabelFrame(
             self.left_frame2,
@@ -1155,7 +1487,7 @@ class AplikasiPCD:
                 pady=6,
                 command=lambda m=mode: self.update_image_async(
                     sharpening,
-                    original_image.copy(),
+                    original_image,
                     m,
                     10
                 )
@@ -1177,6 +1509,16 @@ class AplikasiPCD:
             "BHPF": "bhpf"
         }
 
+        freq_method = tk.StringVar(value="ihpf")
+
+        freq_color = tk.BooleanVar(value=False)
+
+        def apply_freq(method=None, preview=False):
+            if method is not None:
+                freq_method.set(method)
+            run = self.preview_image_async if preview else self.commit_image_async
+            run(sharpening, original_image, freq_method.get(), cutoff_slider.get(), freq_color.get())
+
         for op_name, mode in freq_ops.items():
             tk.Button(
                 freq_frame,
@@ -1189,14 +1531,12 @@ class AplikasiPCD:
                 relief="flat",
                 width=16,
                 pady=6,
-                command=lambda m=mode: self.update_image_async(
-                    sharpening,
-                    original_image.copy(),
-                    m,
-                    60
-                )
+                command=lambda m=mode: apply_freq(m)
             ).pack(pady=5)
 
+        cutoff_slider = self.create_cutoff_slider(freq_frame, "Cutoff HPF", 60, apply_freq)
+        self.create_color_toggle(freq_frame, freq_color, apply_freq)
+
     # Terapkan geometric correction
     def apply_correction(self):
         self.clear_left_submenu2()
@@ -17,6 +17,11 @@ def _to_image(arr, mode="L"):
     else:
         return Image.fromarray(arr, mode="L")
 
+# Sumber bilangan acak: global np.random jika seed None, selain itu RandomState dengan seed
+# tersebut (hasil noise bisa diulang dan boleh di-cache oleh result_cache.py)
+def _rng(seed):
+    return np.random if seed is None else np.random.RandomState(seed)
+
 # Terapkan fungsi noise ke tiap channel jika RGB
 def _apply_noise_to_rgb(img, noise_func):
     if img.mode == "RGB":
@@ -31,42 +36,48 @@ def _apply_noise_to_rgb(img, noise_func):
         return _to_image(noisy, "L")
 
 # Tambah noise Gaussian
-def add_gaussian_noise(img, mean=0, sigma=30):
+def add_gaussian_noise(img, mean=0, sigma=30, seed=None):
+    rng = _rng(seed)
     def noise_func(channel):
-        noise = np.random.normal(mean, sigma, channel.shape)
+        noise = rng.normal(mean, sigma, channel.shape)
         return channel + noise
     return _apply_noise_to_rgb(img, noise_func)
 
 # Tambah noise Rayleigh
-def add_rayleigh_noise(img, scale=40):
+def add_rayleigh_noise(img, scale=40, seed=None):
+    rng = _rng(seed)
     def noise_func(channel):
-        noise = np.random.rayleigh(scale, channel.shape)
+        noise = rng.rayleigh(scale, channel.shape)
         return channel + noise - scale
     return _apply_noise_to_rgb(img, noise_func)
 
 # Tambah noise Erlang (Gamma)
-def add_erlang_noise(img, shape_param=3, scale=20):
+def add_erlang_noise(img, shape_param=3, scale=20, seed=None):
+    rng = _rng(seed)
     def noise_func(channel):
-        noise = np.random.gamma(shape_param, scale, channel.shape)
+        noise = rng.gamma(shape_param, scale, channel.shape)
         return channel + noise - (shape_param * scale / 2)
     return _apply_noise_to_rgb(img, noise_func)
 
 # Tambah noise Eksponensial
-def add_exponential_noise(img, scale=35):
+def add_exponential_noise(img, scale=35, seed=None):
+    rng = _rng(seed)
     def noise_func(channel):
-        noise = np.random.exponential(scale, channel.shape)
+        noise = rng.exponential(scale, channel.shape)
         return channel + noise - scale / 2
     return _apply_noise_to_rgb(img, noise_func)
 
 # Tambah noise Uniform
-def add_uniform_noise(img, low=-50, high=50):
+def add_uniform_noise(img, low=-50, high=50, seed=None):
+    rng = _rng(seed)
     def noise_func(channel):
-        noise = np.random.uniform(low, high, channel.shape)
+        noise = rng.uniform(low, high, channel.shape)
         return channel + noise
     return _apply_noise_to_rgb(img, noise_func)
 
 # Tambah noise salt & pepper
-def add_impulse_noise(img, amount=0.05, salt_vs_pepper=0.5):
+def add_impulse_noise(img, amount=0.05, salt_vs_pepper=0.5, seed=None):
+    rng = _rng(seed)
     if img.mode == "RGB":
         arr = np.asarray(img, dtype=np.float32)
         noisy = arr.copy()
@@ -77,15 +88,15 @@ def add_impulse_noise(img, amount=0.05, salt_vs_pepper=0.5):
 
         # Salt (putih)
         coords = (
-            np.random.randint(0, arr.shape[0], num_salt),
-            np.random.randint(0, arr.shape[1], num_salt)
+            rng.randint(0, arr.shape[0], num_salt),
+            rng.randint(0, arr.shape[1], num_salt)
         )
         noisy[coords[0], coords[1], :] = 255
 
         # Pepper (hitam)
         coords = (
-            np.random.randint(0, arr.shape[0], num_pepper),
-            np.random.randint(0, arr.shape[1], num_pepper)
+            rng.randint(0, arr.shape[0], num_pepper),
+            rng.randint(0, arr.shape[1], num_pepper)
         )
         noisy[coords[0], coords[1], :] = 0
 
@@ -101,15 +112,15 @@ def add_impulse_noise(img, amount=0.05, salt_vs_pepper=0.5):
 
         # Salt (putih)
         coords = (
-            np.random.randint(0, arr.shape[0], num_salt),
-            np.random.randint(0, arr.shape[1], num_salt)
+            rng.randint(0, arr.shape[0], num_salt),
+            rng.randint(0, arr.shape[1], num_salt)
         )
         noisy[coords] = 255
 
         # Pepper (hitam)
         coords = (
-            np.random.randint(0, arr.shape[0], num_pepper),
-            np.random.randint(0, arr.shape[1], num_pepper)
+            rng.randint(0, arr.shape[0], num_pepper),
+            rng.randint(0, arr.shape[1], num_pepper)
         )
         noisy[coords] = 0
 
@@ -0,0 +1,146 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from scheduler import check_cancelled
+
+# Konfigurasi eksekusi paralel: jumlah worker dan backend ("thread" atau "process").
+# Backend thread cukup untuk operasi NumPy (GIL dilepas saat komputasi array);
+# backend process memakai shared memory sehingga strip tidak di-pickle.
+_workers = os.cpu_count() or 1
+_backend = "thread"
+
+# Citra di bawah jumlah piksel ini diproses tanpa paralel (overhead lebih besar dari manfaat)
+MIN_PARALLEL_PIXELS = 1_000_000
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+# Mengatur jumlah worker (None = jumlah core) dan backend eksekusi
+def set_workers(workers=None, backend="thread"):
+    global _workers, _backend
+    if backend not in ("thread", "process"):
+        raise ValueError("backend harus 'thread' atau 'process'")
+    _workers = max(1, workers or os.cpu_count() or 1)
+    _backend = backend
+
+# Jumlah worker yang sedang dipakai
+def get_workers():
+    return _workers
+
+# Apakah array ini layak diproses paralel dengan konfigurasi sekarang
+def should_parallelize(shape):
+    return _workers > 1 and shape[0] * shape[1] >= MIN_PARALLEL_PIXELS and shape[0] >= 2 * _workers
+
+# Pool dibuat sekali dan dipakai ulang selama konfigurasi tidak berubah
+def _get_pool():
+    global _pool, _pool_key
+    with _pool_lock:
+        key = (_workers, _backend)
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            if _backend == "process":
+                _pool = ProcessPoolExecutor(max_workers=_workers)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="pcd-strip")
+            _pool_key = key
+        return _pool
+
+# Batas strip horizontal: (y0, y1, ys, ye) dengan ys/ye termasuk halo
+def _strips(h, count, halo):
+    bounds = np.linspace(0, h, count + 1).astype(int)
+    return [
+        (y0, y1, max(y0 - halo, 0), min(y1 + halo, h))
+        for y0, y1 in zip(bounds[:-1], bounds[1:]) if y1 > y0
+    ]
+
+# Worker proses: membaca strip dari shared memory input dan menulis hasil ke shared memory output
+def _process_strip(func, in_name, in_shape, in_dtype, out_name, out_shape, out_dtype, strip):
+    y0, y1, ys, ye = strip
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    try:
+        src = np.ndarray(in_shape, dtype=in_dtype, buffer=shm_in.buf)
+        dst = np.ndarray(out_shape, dtype=out_dtype, buffer=shm_out.buf)
+        result = func(src[ys:ye])
+        dst[y0:y1] = result[y0 - ys:y1 - ys]
+        del src, dst
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+# Menjalankan func(array) -> array per strip horizontal dengan halo, paralel.
+# Strip teratas/terbawah memakai padding tepi milik func sendiri sehingga hasilnya identik
+# dengan memanggil func pada seluruh array. func harus bisa di-pickle untuk backend "process".
+def run_strips(func, arr, halo, workers=None):
+    workers = workers or _workers
+    h = arr.shape[0]
+    strips = _strips(h, workers, halo)
+    if len(strips) <= 1:
+        return func(arr)
+
+    # Strip pertama dikerjakan langsung untuk mengetahui dtype/shape hasil
+    y0, y1, ys, ye = strips[0]
+    first = func(arr[ys:ye])
+    out_shape = (h,) + first.shape[1:]
+
+    if _backend == "process":
+        return _run_process(func, arr, strips, first, out_shape)
+
+    out = np.empty(out_shape, dtype=first.dtype)
+    out[y0:y1] = first[y0 - ys:y1 - ys]
+
+    def work(strip):
+        sy0, sy1, sys_, sye = strip
+        out[sy0:sy1] = func(arr[sys_:sye])[sy0 - sys_:sy1 - sys_]
+
+    futures = [_get_pool().submit(work, s) for s in strips[1:]]
+    _wait_all(futures)
+    return out
+
+# Menunggu semua strip; jika job dibatalkan (lihat scheduler.py) strip yang belum jalan dibatalkan
+def _wait_all(futures):
+    try:
+        for future in futures:
+            check_cancelled()
+            future.result()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+def _run_process(func, arr, strips, first, out_shape):
+    arr = np.ascontiguousarray(arr)
+    shm_in = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    out_nbytes = int(np.prod(out_shape)) * first.dtype.itemsize
+    shm_out = shared_memory.SharedMemory(create=True, size=max(out_nbytes, 1))
+    try:
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm_in.buf)[:] = arr
+        out_view = np.ndarray(out_shape, dtype=first.dtype, buffer=shm_out.buf)
+        y0, y1, ys, ye = strips[0]
+        out_view[y0:y1] = first[y0 - ys:y1 - ys]
+
+        pool = _get_pool()
+        futures = [
+            pool.submit(
+                _process_strip, func,
+                shm_in.name, arr.shape, arr.dtype.str,
+                shm_out.name, out_shape, first.dtype.str, strip
+            )
+            for strip in strips[1:]
+        ]
+        _wait_all(futures)
+        out = out_view.copy()
+        del out_view
+        return out
+    finally:
+        shm_in.close()
+        shm_in.unlink()
+        shm_out.close()
+        shm_out.unlink()
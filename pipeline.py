@@ -0,0 +1,157 @@
+from PIL import Image
+
+import basic_ops
+import enhancement
+from geometry import Affine
+from lut import (
+    PointOp, apply_ops, arithmetic_op, boolean_not_op, brightness_op,
+    contrast_op, identity_tables, negative_op, threshold_op,
+)
+
+# Operasi per piksel yang bisa digabung menjadi satu tabel (lut.py)
+_POINTWISE = {
+    basic_ops.negative: lambda: negative_op(),
+    basic_ops.grayscale: lambda: PointOp("grayscale", lambda mode, mean: identity_tables(mode), convert="L"),
+    basic_ops.arithmetic: lambda op="add", value=50: arithmetic_op(op, value),
+    basic_ops.threshold: lambda t=128: threshold_op(t),
+    basic_ops.boolean_not: lambda: boolean_not_op(),
+    enhancement.adjust_brightness: lambda factor=1.0: brightness_op(factor),
+    enhancement.adjust_contrast: lambda factor=1.0: contrast_op(factor),
+}
+
+# Operasi geometrik yang bisa digabung menjadi satu transformasi affine (geometry.py)
+_GEOMETRIC = {
+    basic_ops.translation: lambda aff, tx=50, ty=50: aff.translate(tx, ty),
+    basic_ops.rotation: lambda aff, angle=45: aff.rotate(angle),
+    basic_ops.zooming: lambda aff, factor=1.2: aff.zoom(factor),
+    basic_ops.flipping: lambda aff, mode="horizontal": aff.flip(mode),
+    basic_ops.cropping: lambda aff, box=(50, 50, 200, 200): aff.crop(box),
+}
+
+POINTWISE, GEOMETRIC, OPAQUE = "pointwise", "geometric", "opaque"
+
+
+class Node:
+    """Satu operasi tercatat: func(img, *args) beserta jenisnya."""
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        if func in _POINTWISE:
+            self.kind = POINTWISE
+        elif func in _GEOMETRIC:
+            self.kind = GEOMETRIC
+        else:
+            self.kind = OPAQUE
+
+    # PointOp untuk node per piksel; mode di luar lut.LUT_MODES memakai fungsi aslinya
+    def point_op(self):
+        op = _POINTWISE[self.func](*self.args)
+        op.fallback = lambda img: self.func(img, *self.args)
+        return op
+
+    # Menambahkan transformasi node geometrik ke affine yang sedang dikumpulkan
+    def add_to(self, affine):
+        return _GEOMETRIC[self.func](affine, *self.args)
+
+
+class Pipeline:
+    """
+    Graf operasi lazy (linear) dari citra sumber. Operasi dari basic_ops, enhancement dan noise
+    hanya dicatat; saat hasil diminta, node per piksel yang berurutan digabung menjadi satu tabel,
+    node geometrik yang berurutan menjadi satu transformasi affine, dan node lain (noise,
+    convolution, filter, ...) dijalankan apa adanya.
+    materialize() menghasilkan citra resolusi penuh (untuk disimpan); render(max_size) hanya
+    menghitung citra seukuran tampilan.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.nodes = []
+        # Hasil terakhir yang sudah dihitung penuh: (jumlah node, citra)
+        self._cache = (0, source)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # Mencatat operasi func(img, *args); mengembalikan pipeline agar bisa dirantai
+    def apply(self, func, *args):
+        self.nodes.append(Node(func, args))
+        return self
+
+    # Menghapus node terakhir (undo pada pipeline)
+    def pop(self):
+        node = self.nodes.pop()
+        if self._cache[0] > len(self.nodes):
+            self._cache = (0, self.source)
+        return node
+
+    # Citra resolusi penuh hasil seluruh node
+    def materialize(self):
+        count, img = self._cache
+        img = _run(img, self.nodes[count:])
+        self._cache = (len(self.nodes), img)
+        return img
+
+    # Citra untuk tampilan, muat di dalam max_size (w, h). Node opaque tetap dihitung penuh
+    # (hasilnya di-cache); node per piksel dan geometrik setelahnya dihitung pada citra kecil.
+    def render(self, max_size):
+        last_opaque = max((i + 1 for i, n in enumerate(self.nodes) if n.kind == OPAQUE), default=0)
+        count, img = self._cache
+        if count < last_opaque:
+            img = _run(img, self.nodes[count:last_opaque])
+            self._cache = (last_opaque, img)
+            count = last_opaque
+        tail = self.nodes[count:]
+
+        full_w, full_h = _output_size(img.size, tail)
+        scale = min(max_size[0] / full_w, max_size[1] / full_h, 1.0)
+        if scale >= 1.0:
+            return _run(img, tail)
+        small = img.resize(
+            (max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+            Image.BILINEAR, reducing_gap=2.0
+        )
+        return _run(small, tail, full_size=img.size)
+
+
+# Ukuran keluaran setelah node (hanya node per piksel dan geometrik)
+def _output_size(size, nodes):
+    for group_kind, group in _groups(nodes):
+        if group_kind == GEOMETRIC:
+            affine = Affine(size)
+            for node in group:
+                affine = node.add_to(affine)
+            size = affine.size
+    return size
+
+# Mengelompokkan node berurutan yang sejenis
+def _groups(nodes):
+    groups = []
+    for node in nodes:
+        if node.kind != OPAQUE and groups and groups[-1][0] == node.kind:
+            groups[-1][1].append(node)
+        else:
+            groups.append((node.kind, [node]))
+    return groups
+
+# Menjalankan node pada img. full_size: ukuran resolusi penuh jika img adalah versi kecil
+# (koordinat operasi geometrik tetap dalam piksel resolusi penuh, lalu diskalakan).
+def _run(img, nodes, full_size=None):
+    full_size = full_size or img.size
+    for kind, group in _groups(nodes):
+        if kind == POINTWISE:
+            img = apply_ops(img, [node.point_op() for node in group])
+        elif kind == GEOMETRIC:
+            affine = Affine(full_size)
+            for node in group:
+                affine = node.add_to(affine)
+            full_size = affine.size
+            if img.size != affine.input_size:
+                affine = affine.rescaled(img.size)
+            img = affine.apply(img)
+        else:
+            for node in group:
+                img = node.func(img, *node.args)
+            full_size = img.size
+    return img
@@ -0,0 +1,57 @@
+import threading
+
+from resampling import REDUCE_MODES
+
+# Level tidak diperkecil lagi jika sisi terpanjangnya sudah sebesar ini
+_MIN_SIDE = 64
+
+
+class ImagePyramid:
+    """
+    Piramida citra untuk tampilan dan preview: level k adalah citra dasar yang diperkecil
+    1/2^k (rata-rata blok 2x2 dengan Image.reduce dari level sebelumnya). Level dibuat saat
+    pertama kali diminta, jadi membuat piramida baru untuk setiap current_image tidak ada biayanya.
+    Koordinat level k = koordinat citra dasar * 0.5^k.
+    """
+
+    def __init__(self, img):
+        self.levels = [img]
+        self._lock = threading.Lock()
+
+    @property
+    def base(self):
+        return self.levels[0]
+
+    # Level ke-k (atau level terkecil yang ada jika citra sudah terlalu kecil untuk dibagi lagi)
+    def level(self, k):
+        with self._lock:
+            while len(self.levels) <= k and max(self.levels[-1].size) > _MIN_SIDE:
+                self.levels.append(_half(self.levels[-1]))
+            k = min(k, len(self.levels) - 1)
+            return self.levels[k], k
+
+    # Level terkecil yang masih minimal seukuran tampilan dengan skala scale (relatif citra dasar).
+    # Mengembalikan (citra level, skala level), mis. (citra 1/4, 0.25).
+    def for_scale(self, scale):
+        k = 0
+        while 0.5 ** (k + 1) >= scale:
+            k += 1
+        img, k = self.level(k)
+        return img, 0.5 ** k
+
+    # Level terkecil yang masih memuat size (w, h) saat dipaskan dengan rasio aspek citra
+    def for_size(self, size):
+        w, h = self.base.size
+        return self.for_scale(min(size[0] / w, size[1] / h))
+
+
+# Satu level piramida: mode yang tidak bisa di-reduce dikonversi dulu (hanya untuk tampilan)
+def _half(img):
+    if img.mode not in REDUCE_MODES:
+        if img.mode in ("P", "PA"):
+            img = img.convert("RGBA")
+        elif img.mode == "1":
+            img = img.convert("L")
+        else:
+            img = img.convert("I")
+    return img.reduce(2)
@@ -0,0 +1,54 @@
+from PIL import Image
+
+# Rasio minimum antara hasil Image.reduce dan ukuran akhir. Sisa skala dikerjakan oleh
+# resample biasa (mis. LANCZOS) sehingga kualitasnya hampir sama dengan resize penuh.
+DEFAULT_REDUCING_GAP = 2.0
+
+# Mode yang tidak bisa di-reduce / diinterpolasi (PIL memakai NEAREST untuk mode ini)
+_NEAREST_MODES = ("1", "P")
+
+# Mode yang didukung Image.reduce
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK", "YCbCr", "LAB", "HSV", "I", "F")
+
+
+# Mengubah ukuran img (atau area box-nya) menjadi size.
+# Memperkecil dengan faktor bulat tepat cukup Image.reduce (rata-rata blok, tanpa resample lain);
+# faktor lain: reduce dengan faktor bulat terbesar yang masih menyisakan rasio reducing_gap,
+# lalu resample sisanya. Memperbesar dan NEAREST memakai resize biasa.
+def resize(img, size, resample=Image.LANCZOS, box=None, reducing_gap=DEFAULT_REDUCING_GAP):
+    size = (max(1, int(size[0])), max(1, int(size[1])))
+    if box is None:
+        box = (0, 0) + img.size
+    if resample == Image.NEAREST or img.mode in _NEAREST_MODES:
+        return img.resize(size, resample, box=box)
+
+    factors = _exact_factors(box, size)
+    if factors is not None and img.mode in REDUCE_MODES:
+        return img.reduce(factors, box=tuple(int(v) for v in box))
+    return img.resize(size, resample, box=box, reducing_gap=reducing_gap)
+
+# Faktor reduce (fx, fy) jika box persis kelipatan bulat dari size, selain itu None
+def _exact_factors(box, size):
+    if any(v != int(v) for v in box):
+        return None
+    box_w, box_h = box[2] - box[0], box[3] - box[1]
+    if box_w % size[0] or box_h % size[1]:
+        return None
+    factors = (int(box_w // size[0]), int(box_h // size[1]))
+    if factors == (1, 1):
+        return None
+    return factors
+
+
+# Membuka file JPEG untuk tampilan/preview: decoder diminta langsung menghasilkan versi kecil
+# (skala DCT 1/2, 1/4 atau 1/8) yang masih minimal sebesar max_size, jadi citra 48 MP tidak
+# perlu di-decode penuh. Format lain mengembalikan None (tidak ada decode cepat).
+# Bukan untuk pemrosesan: resolusinya bisa lebih kecil dari file.
+def open_draft(path, max_size):
+    img = Image.open(path)
+    if img.format != "JPEG":
+        img.close()
+        return None
+    img.draft(img.mode, max_size)
+    img.load()
+    return img
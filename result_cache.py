@@ -0,0 +1,233 @@
+import hashlib
+import inspect
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from history import image_nbytes
+
+# Batas memori default untuk hasil yang di-cache (byte)
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Modul yang operasinya di-cache
+CACHEABLE_MODULES = {"basic_ops", "edge_detection", "enhancement", "segmentation", "noise"}
+
+# Modul yang operasinya acak: hanya di-cache jika dipanggil dengan seed
+SEEDED_MODULES = {"noise"}
+
+# Jumlah digest citra terakhir yang diingat per objek Image
+_DIGEST_CACHE_SIZE = 8
+
+# Ukuran strip (byte) saat meng-hash piksel citra; citra tidak disalin utuh dengan tobytes()
+_HASH_BLOCK = 4 * 1024 * 1024
+_digests = OrderedDict()
+_digest_lock = threading.Lock()
+
+
+# Digest isi citra (blake2b atas mode, ukuran dan data piksel). Digest diingat per objek Image
+# (citra tidak diubah in-place di aplikasi ini), jadi citra aktif hanya di-hash sekali.
+# Piksel di-hash per strip baris sehingga memori tambahan hanya sebesar satu strip.
+def image_digest(img):
+    key = id(img)
+    with _digest_lock:
+        entry = _digests.get(key)
+        if entry is not None and entry[0]() is img:
+            _digests.move_to_end(key)
+            return entry[1]
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.mode}|{img.size}|".encode())
+    w, height = img.size
+    rows = max(1, _HASH_BLOCK // max(1, w * len(img.getbands())))
+    for y in range(0, height, rows):
+        h.update(img.crop((0, y, w, min(y + rows, height))).tobytes())
+    if img.mode == "P":
+        h.update(bytes(img.getpalette() or ()))
+    digest = h.hexdigest()
+
+    with _digest_lock:
+        _digests[key] = (weakref.ref(img), digest)
+        _digests.move_to_end(key)
+        while len(_digests) > _DIGEST_CACHE_SIZE:
+            _digests.popitem(last=False)
+    return digest
+
+# Representasi argumen untuk kunci cache; None jika argumen tidak bisa dijadikan kunci
+# (mis. fungsi/lambda), sehingga panggilannya tidak di-cache
+def arg_key(value):
+    if isinstance(value, Image.Image):
+        return ("image", image_digest(value))
+    if isinstance(value, np.ndarray):
+        h = hashlib.blake2b(memoryview(np.ascontiguousarray(value)).cast("B"), digest_size=16)
+        return ("array", value.dtype.str, value.shape, h.hexdigest())
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)):
+        items = tuple(arg_key(v) for v in value)
+        return None if any(i is None and v is not None for i, v in zip(items, value)) else items
+    return None
+
+
+# Argumen func(*args) setelah default diterapkan (dict nama -> nilai), atau None jika
+# hasil panggilan ini tidak boleh di-cache
+def bound_arguments(func, args):
+    module = getattr(func, "__module__", None)
+    if module not in CACHEABLE_MODULES or not getattr(func, "replayable", True):
+        return None
+    try:
+        bound = inspect.signature(func).bind(*args)
+    except (TypeError, ValueError):
+        return None
+    bound.apply_defaults()
+    if module in SEEDED_MODULES and bound.arguments.get("seed") is None:
+        return None
+    return bound.arguments
+
+# Kunci (modul, nama fungsi, parameter) untuk func(*args); to_key mengubah tiap argumen
+# menjadi nilai kunci (None jika argumen itu tidak bisa dijadikan kunci)
+def call_key(func, args, to_key=None):
+    to_key = to_key or arg_key
+    arguments = bound_arguments(func, args)
+    if arguments is None:
+        return None
+    params = []
+    for name, value in arguments.items():
+        key = to_key(value)
+        if key is None and value is not None:
+            return None
+        params.append((name, key))
+    return (func.__module__, func.__qualname__, tuple(params))
+
+
+class ResultCache:
+    """
+    Cache hasil operasi citra (memoization) dengan eviction LRU di bawah batas memori.
+    Kunci: modul dan nama fungsi, serta argumen setelah default diterapkan; argumen Image
+    diwakili digest isinya, jadi citra lain dengan isi yang sama juga kena cache.
+    Hanya fungsi dari CACHEABLE_MODULES yang hasilnya Image yang di-cache; fungsi noise
+    hanya jika seed diberikan, dan fungsi dengan atribut replayable = False (operasi
+    geometrik yang digabung, lihat geometry.py) tidak di-cache.
+    disk: DiskCache opsional (disk_cache.py); hasil juga dibaca/ditulis ke disk sehingga
+    bertahan antar sesi.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, disk=None):
+        self.memory_budget = memory_budget
+        self.disk = disk
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Menjalankan func(*args) lewat cache; mengembalikan (hasil, durasi detik). Saat cache hit,
+    # durasi adalah waktu komputasi aslinya (dipakai history mode oplog sebagai biaya replay).
+    def timed_call(self, func, *args):
+        key = self.make_key(func, args)
+        disk_key = self.disk.make_key(func, args) if self.disk is not None and key is not None else None
+        if key is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+            if entry is not None:
+                if self.disk is not None:
+                    self.disk.register(entry[0], disk_key)
+                return entry[0], entry[1]
+
+        if disk_key is not None:
+            cached = self.disk.get(disk_key)
+            if cached is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._store(key, *cached)
+                self.disk.register(cached[0], disk_key)
+                return cached
+
+        if key is not None:
+            with self._lock:
+                self.misses += 1
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if key is not None and isinstance(result, Image.Image):
+            self._store(key, result, elapsed)
+            if disk_key is not None:
+                self.disk.register(result, disk_key)
+                self.disk.put(disk_key, result, elapsed)
+        return result, elapsed
+
+    # Menjalankan func(*args) lewat cache dan hanya mengembalikan hasilnya
+    def call(self, func, *args):
+        return self.timed_call(func, *args)[0]
+
+    # Kunci cache untuk func(*args), atau None jika panggilan ini tidak boleh di-cache.
+    # Citra yang asal-usulnya dikenal cache disk diwakili asal-usul itu (tanpa meng-hash piksel).
+    def make_key(self, func, args):
+        if self.disk is None:
+            return call_key(func, args)
+
+        def to_key(value):
+            if isinstance(value, Image.Image):
+                lineage = self.disk.key_of(value)
+                if lineage is not None:
+                    return ("lineage", lineage)
+            return arg_key(value)
+        return call_key(func, args, to_key)
+
+    def _store(self, key, result, elapsed):
+        size = image_nbytes(result)
+        if size > self.memory_budget:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (result, elapsed, size)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.memory_budget and self._entries:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    # Mengubah batas memori (entri lama dibuang jika perlu)
+    def set_memory_budget(self, budget):
+        with self._lock:
+            self.memory_budget = budget
+            self._evict()
+
+    # Mengosongkan cache (statistik tetap)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def memory_usage(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Statistik cache: jumlah hit (memori / disk), miss, eviction, jumlah entri dan memori yang dipakai
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,172 @@
+import threading
+from collections import OrderedDict
+
+# Penjadwal job pemrosesan citra: sejumlah kecil worker persisten dengan antrean
+# "latest wins" per channel. Job baru di channel yang sama menggantikan job yang belum
+# jalan dan membatalkan job yang sedang jalan; hasil job usang (generasi lama) dibuang.
+
+_local = threading.local()
+
+
+class JobCancelled(Exception):
+    """Dilempar oleh check_cancelled() ketika job yang sedang berjalan dibatalkan."""
+
+
+class CancelToken:
+    """
+    Token pembatalan kooperatif. Bisa dipanggil tanpa argumen (mengembalikan True jika
+    dibatalkan), sehingga cocok sebagai parameter cancel pada tiling.process_tiled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def __call__(self):
+        return self._event.is_set()
+
+
+class Job:
+    """Satu permintaan func(*args) pada sebuah channel beserta nomor generasinya."""
+
+    def __init__(self, channel, generation, func, args, on_done, on_error):
+        self.channel = channel
+        self.generation = generation
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.token = CancelToken()
+
+
+# Token job yang sedang dijalankan di thread ini (None di luar job)
+def current_token():
+    return getattr(_local, "token", None)
+
+# Titik pembatalan untuk operasi panjang: melempar JobCancelled jika job sudah usang
+def check_cancelled():
+    token = current_token()
+    if token is not None and token.cancelled:
+        raise JobCancelled()
+
+
+class Scheduler:
+    """
+    workers: jumlah thread worker persisten. Satu channel paling banyak menjalankan satu job
+    sekaligus, jadi worker tambahan hanya dipakai oleh channel lain (mis. preview).
+    dispatch: fungsi untuk menjalankan callback di thread UI, mis. lambda fn: root.after(0, fn).
+    """
+
+    def __init__(self, workers=1, dispatch=None):
+        self._dispatch = dispatch or (lambda fn: fn())
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()
+        self._running = {}
+        self._generation = {}
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"pcd-job-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    # Menjadwalkan func(*args). on_done(result) / on_error(exc) dipanggil lewat dispatch
+    # hanya jika job masih yang terbaru di channel-nya.
+    def submit(self, func, *args, channel="image", on_done=None, on_error=None):
+        with self._cond:
+            generation = self._generation.get(channel, 0) + 1
+            self._generation[channel] = generation
+            job = Job(channel, generation, func, args, on_done, on_error)
+            running = self._running.get(channel)
+            if running is not None:
+                running.token.cancel()
+            self._pending.pop(channel, None)
+            self._pending[channel] = job
+            self._cond.notify()
+        return job
+
+    # Membatalkan job yang menunggu dan yang sedang berjalan pada channel (atau semua channel)
+    def cancel(self, channel=None):
+        with self._cond:
+            channels = [channel] if channel is not None else list(self._generation)
+            for ch in channels:
+                self._generation[ch] = self._generation.get(ch, 0) + 1
+                self._pending.pop(ch, None)
+                running = self._running.get(ch)
+                if running is not None:
+                    running.token.cancel()
+
+    # Apakah job masih yang terbaru di channel-nya
+    def is_current(self, job):
+        with self._cond:
+            return self._generation.get(job.channel) == job.generation
+
+    # Apakah ada job yang menunggu atau berjalan
+    def busy(self, channel=None):
+        with self._cond:
+            if channel is None:
+                return bool(self._pending or self._running)
+            return channel in self._pending or channel in self._running
+
+    # Menghentikan worker (job yang sedang berjalan dibatalkan)
+    def shutdown(self):
+        self.cancel()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    # Mengambil job tertua dari channel yang sedang tidak menjalankan job
+    def _next_job(self):
+        for channel in self._pending:
+            if channel not in self._running:
+                return self._pending.pop(channel)
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and not self._closed:
+                    self._cond.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._running[job.channel] = job
+
+            _local.token = job.token
+            try:
+                result = job.func(*job.args)
+                error = None
+            except JobCancelled:
+                result = error = None
+                job.token.cancel()
+            except Exception as e:
+                result, error = None, e
+            finally:
+                _local.token = None
+                with self._cond:
+                    del self._running[job.channel]
+                    self._cond.notify_all()
+
+            if not job.token.cancelled:
+                self._deliver(job, result, error)
+
+    # Callback dijalankan di thread UI; generasi dicek lagi di sana karena job baru
+    # bisa masuk antara selesainya worker dan dijalankannya callback
+    def _deliver(self, job, result, error):
+        def callback():
+            if not self.is_current(job):
+                return
+            if error is None:
+                if job.on_done is not None:
+                    job.on_done(result)
+            elif job.on_error is not None:
+                job.on_error(error)
+        self._dispatch(callback)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import tiling
+from scheduler import JobCancelled
+
+# Argumen tambahan untuk operasi yang halonya bergantung pada argumen
+EXTRA_ARGS = {
+    "convolution": [(np.ones((5, 5)) / 25,), ((np.ones((7, 1)) / 7, np.ones((1, 3)) / 3),)],
+    "blur_image": [(2.5,)],
+    "sharpening": [("highboost", 2)],
+    "arithmetic": [("sub", 30), ("mul", 2)],
+    "threshold": [(90,)],
+    "edge_detect_image": [(60,)],
+}
+
+CASES = [(name, ()) for name in tiling.OPERATION_HALO] + [
+    (name, args) for name, arg_list in EXTRA_ARGS.items() for args in arg_list
+]
+
+
+@pytest.fixture(params=["L", "RGB"])
+def source(request):
+    rng = np.random.default_rng(0)
+    shape = (150, 205) if request.param == "L" else (150, 205, 3)
+    return rng.integers(0, 256, shape, dtype=np.uint8)
+
+
+# Hasil per tile harus sama persis dengan hasil operasi pada citra penuh
+@pytest.mark.parametrize("name, args", CASES, ids=[n + ("-args" if a else "") for n, a in CASES])
+def test_tiled_matches_full_image(source, name, args, tmp_path):
+    op = tiling.find_operation(name)
+    full = np.asarray(op(Image.fromarray(source), *args))
+    tiled = tiling.tiled_operation(op, source, *args, sink_path=str(tmp_path / "out.npy"), tile=48)
+    assert tiled.shape == full.shape
+    assert tiled.dtype == full.dtype
+    np.testing.assert_array_equal(tiled, full)
+
+
+@pytest.mark.parametrize("name", sorted(tiling.NOT_TILEABLE))
+def test_not_tileable_rejected(name):
+    op = tiling.find_operation(name)
+    with pytest.raises(ValueError):
+        tiling.operation_halo(op)
+
+
+@pytest.mark.parametrize("method", ["ihpf", "bhpf"])
+def test_frequency_sharpening_rejected(method):
+    with pytest.raises(ValueError):
+        tiling.operation_halo(tiling.find_operation("sharpening"), method, 30)
+
+
+# Pembatalan di tengah proses melempar JobCancelled dan tidak meninggalkan file hasil setengah jadi
+def test_cancel_raises_and_removes_partial_sink(source, tmp_path):
+    sink_path = tmp_path / "out.npy"
+    calls = []
+
+    def cancel():
+        calls.append(None)
+        return len(calls) > 3
+
+    with pytest.raises(JobCancelled):
+        tiling.process_tiled(lambda tile: tile, source, 0, str(sink_path), tile=48, cancel=cancel)
+    assert not sink_path.exists()
@@ -0,0 +1,257 @@
+import argparse
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+import basic_ops
+import edge_detection
+import enhancement
+import noise
+import segmentation
+from scheduler import JobCancelled, current_token
+
+# Ukuran tile default (piksel per sisi, belum termasuk halo)
+TILE_SIZE = 1024
+
+# Jumlah baris per strip saat menyalin citra ke file .npy
+_STRIP_ROWS = 256
+
+# Batas jumlah piksel citra sumber untuk jalur tiled. Citra didekode langsung ke file, bukan ke
+# memori, jadi batas global PIL (Image.MAX_IMAGE_PIXELS, ±89 MP) terlalu kecil di sini.
+MAX_IMAGE_PIXELS = 2 ** 31
+
+# Mode citra yang bisa didekode langsung ke memmap: mode -> (mode memori PIL, byte per piksel)
+_DECODE_MODES = {"L": ("L", 1), "P": ("P", 1), "RGB": ("RGBX", 4), "RGBA": ("RGBA", 4)}
+
+_open_lock = threading.Lock()
+
+# Halo (jari-jari footprint) per operasi. Nilai bisa berupa int atau fungsi dari argumen operasi.
+OPERATION_HALO = {
+    # Operasi per piksel
+    "negative": 0,
+    "grayscale": 0,
+    "arithmetic": 0,
+    "boolean_not": 0,
+    "threshold": 0,
+    "to_rgb": 0,
+    "to_hsv": 0,
+    "to_cmy": 0,
+    "to_yuv": 0,
+    "to_yiq": 0,
+    "pseudo_color": 0,
+    "adjust_brightness": 0,
+    # Operasi ketetanggaan
+    "sobel_edge": 1,
+    "prewitt_edge": 1,
+    "roberts_edge": 1,
+    "laplacian_edge": 1,
+    "log_edge": 2,
+    "compass_edge": 1,
+    "edge_detect_image": 1,
+    "contour_image": 1,
+    "watershed_image": 1,
+    "convolution": lambda kernel=None, method="auto": kernel_halo(kernel),
+    "blur_image": lambda intensity=1: int(np.ceil(3 * intensity)) + 1,
+    "sharpen_image": 1,
+    "sharpening": lambda method="highpass", intensity=1, color=False: sharpening_halo(method),
+}
+
+# Operasi yang hasil per tile-nya tidak sama dengan hasil citra penuh, beserta alasannya
+_GLOBAL = "memakai statistik global citra (histogram, rata-rata, spektrum, hysteresis)"
+_RANDOM = "mengambil bilangan acak sesuai ukuran citra (dengan seed, pola yang sama berulang di tiap tile)"
+NOT_TILEABLE = {
+    "adjust_contrast": _GLOBAL,
+    "histogram_equalization": _GLOBAL,
+    "correction": _GLOBAL,
+    "smoothing": _GLOBAL,
+    "frequency_lowpass_filter": _GLOBAL,
+    "frequency_highpass_filter": _GLOBAL,
+    "fourier_transform": _GLOBAL,
+    "canny_edge": _GLOBAL,
+    "watermark_image": _GLOBAL,
+    "to_binary": "memakai dithering error diffusion yang merambat melewati batas tile",
+    "add_gaussian_noise": _RANDOM,
+    "add_rayleigh_noise": _RANDOM,
+    "add_erlang_noise": _RANDOM,
+    "add_exponential_noise": _RANDOM,
+    "add_uniform_noise": _RANDOM,
+    "add_impulse_noise": _RANDOM,
+}
+
+# Modul yang operasinya bisa dipanggil dari CLI
+_MODULES = (basic_ops, edge_detection, enhancement, noise, segmentation)
+
+
+# Halo dari footprint kernel (array 2D atau pasangan separable (kolom, baris))
+def kernel_halo(*kernels):
+    halo = 0
+    for kernel in kernels:
+        if kernel is None:
+            kernel = np.zeros((3, 3))
+        if isinstance(kernel, tuple):
+            kh, kw = len(kernel[0]), len(kernel[1])
+        else:
+            kh, kw = np.asarray(kernel).shape
+        halo = max(halo, kh // 2, kw // 2)
+    return halo
+
+# Halo sharpening: metode kernel 3x3 cukup halo 1, metode frekuensi (ihpf/bhpf) memakai
+# seluruh spektrum citra sehingga tidak bisa diproses per tile
+def sharpening_halo(method="highpass"):
+    if method in ("ihpf", "bhpf"):
+        raise ValueError(f"Sharpening {method} memakai filter frekuensi dan tidak bisa diproses per tile.")
+    return 1
+
+# Halo untuk sebuah operasi beserta argumennya
+def operation_halo(op, *args):
+    name = op.__name__
+    if name in NOT_TILEABLE:
+        raise ValueError(f"Operasi {name} {NOT_TILEABLE[name]} dan tidak bisa diproses per tile.")
+    if name not in OPERATION_HALO:
+        raise ValueError(f"Halo untuk operasi {name} belum diketahui.")
+    halo = OPERATION_HALO[name]
+    return halo(*args) if callable(halo) else halo
+
+# Membuka file citra dengan batas piksel MAX_IMAGE_PIXELS (batas global PIL dikembalikan setelahnya)
+def open_large_image(path):
+    with _open_lock:
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+        try:
+            return Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+# Men-decode img (belum di-load) langsung ke buffer uint8 (mis. memmap): memori citra PIL
+# diarahkan ke buffer sebelum load(), jadi decoder menulis baris demi baris ke file dan citra
+# tidak pernah utuh di RAM. False jika PIL memetakan file sumbernya sendiri (format tanpa kompresi).
+def _decode_into(img, buffer):
+    store_mode = _DECODE_MODES[img.mode][0]
+    target = Image.frombuffer(store_mode, img.size, buffer, "raw", store_mode, 0, 1)
+    img.im = target.im
+    img.load()
+    return img.im is target.im
+
+# Men-decode img ke file sementara di folder directory (dihapus setelah selesai).
+# Mode lain di-decode biasa oleh PIL saat strip pertama dibaca.
+@contextmanager
+def _decoded(img, directory):
+    if img.mode not in _DECODE_MODES or not img.tile:
+        yield
+        return
+    fd, path = tempfile.mkstemp(suffix=".raw", dir=directory)
+    os.close(fd)
+    try:
+        channels = _DECODE_MODES[img.mode][1]
+        shape = (img.height, img.width) + ((channels,) if channels > 1 else ())
+        _decode_into(img, np.memmap(path, dtype=np.uint8, mode="w+", shape=shape))
+        yield
+    finally:
+        os.remove(path)
+
+# Menyalin citra ke file .npy sehingga bisa dibuka sebagai memory-map. Citra L didekode langsung
+# ke file .npy; mode lain didekode ke file sementara lalu dikonversi per strip ke L / RGB.
+# Cukup dilakukan sekali per file sumber.
+def image_to_npy(image_path, npy_path):
+    with open_large_image(image_path) as img:
+        mode = img.mode if img.mode in ("L", "RGB") else "RGB"
+        w, h = img.size
+        shape = (h, w) if mode == "L" else (h, w, 3)
+        sink = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.uint8, shape=shape)
+        if not (img.mode == "L" and _decode_into(img, sink)):
+            with _decoded(img, os.path.dirname(os.path.abspath(npy_path))):
+                for y in range(0, h, _STRIP_ROWS):
+                    strip = img.crop((0, y, w, min(y + _STRIP_ROWS, h))).convert(mode)
+                    sink[y:y + strip.height] = np.asarray(strip)
+        sink.flush()
+    return np.load(npy_path, mmap_mode="r")
+
+# Membuka sumber: file .npy dibuka sebagai memory-map, file citra dikonversi dulu ke .npy
+def open_source(path, cache_dir=None):
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    cache_dir = cache_dir or tempfile.gettempdir()
+    base = os.path.splitext(os.path.basename(path))[0]
+    return image_to_npy(path, os.path.join(cache_dir, base + ".npy"))
+
+# Membungkus operasi berbasis PIL Image menjadi fungsi array -> array
+def image_operation(op, *args):
+    def run(tile):
+        return np.asarray(op(Image.fromarray(tile), *args))
+    return run
+
+# Menjalankan func(array) -> array per tile dengan halo, membaca dari src (boleh memmap)
+# dan menulis ke sink memmap. Memori puncak sebanding dengan ukuran tile, bukan ukuran citra.
+# Tile yang menyentuh tepi citra memakai padding tepi milik operasi itu sendiri,
+# sehingga hasilnya sama dengan memproses citra penuh.
+# cancel: fungsi opsional tanpa argumen; jika bernilai True proses dihentikan di antara tile
+# dengan JobCancelled. Tanpa cancel, token job scheduler yang sedang berjalan (jika ada) yang dipakai.
+# Jika proses berhenti (dibatalkan atau error), file sink yang baru setengah terisi dihapus.
+def process_tiled(func, src, halo, sink_path=None, tile=TILE_SIZE, cancel=None):
+    if cancel is None:
+        cancel = current_token()
+    h, w = src.shape[:2]
+    sink = None
+    try:
+        for y0 in range(0, h, tile):
+            for x0 in range(0, w, tile):
+                if cancel is not None and cancel():
+                    raise JobCancelled()
+                y1, x1 = min(y0 + tile, h), min(x0 + tile, w)
+                ys, xs = max(y0 - halo, 0), max(x0 - halo, 0)
+                ye, xe = min(y1 + halo, h), min(x1 + halo, w)
+
+                result = func(np.ascontiguousarray(src[ys:ye, xs:xe]))
+                if sink is None:
+                    sink = _create_sink(sink_path, (h, w) + result.shape[2:], result.dtype)
+                sink[y0:y1, x0:x1] = result[y0 - ys:y1 - ys, x0 - xs:x1 - xs]
+    except BaseException:
+        if sink is not None:
+            # Referensi terakhir ke memmap dilepas dulu agar file bisa dihapus
+            path, sink = sink.filename, None
+            os.remove(path)
+        raise
+    if sink is not None:
+        sink.flush()
+    return sink
+
+# Membuat sink memmap; tanpa path dipakai file sementara
+def _create_sink(path, shape, dtype):
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+# Menjalankan operasi dari modul (mis. sobel_edge) secara tiled dengan halo otomatis
+def tiled_operation(op, src, *args, sink_path=None, tile=TILE_SIZE, cancel=None):
+    halo = operation_halo(op, *args)
+    return process_tiled(image_operation(op, *args), src, halo, sink_path, tile, cancel)
+
+# Mencari fungsi operasi berdasarkan nama di modul-modul operasi
+def find_operation(name):
+    for module in _MODULES:
+        op = getattr(module, name, None)
+        if callable(op) and not name.startswith("_"):
+            return op
+    raise ValueError(f"Operasi {name} tidak ditemukan.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Proses citra besar per tile (out-of-core).")
+    parser.add_argument("operation", help="nama operasi, mis. sobel_edge")
+    parser.add_argument("source", help="file citra atau .npy sumber")
+    parser.add_argument("output", help="file .npy hasil")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="ukuran tile (piksel)")
+    args = parser.parse_args()
+
+    result = tiled_operation(
+        find_operation(args.operation),
+        open_source(args.source),
+        sink_path=args.output,
+        tile=args.tile,
+    )
+    print(f"Selesai: {args.output} {result.shape} {result.dtype}")
@@ -0,0 +1,100 @@
+import math
+
+from PIL import Image, ImageTk
+
+from resampling import resize
+
+# Bagian frame yang dipakai citra saat zoom 1.0 (sisa sebagai margin)
+FIT_MARGIN = 0.95
+
+# Piksel tambahan di sekitar area yang terlihat saat crop-first (dukungan kernel LANCZOS)
+_CROP_MARGIN = 3
+
+
+class Viewport:
+    """
+    Renderer tampilan citra ke sebuah tk.Label. Hanya area citra yang terlihat di frame yang
+    di-crop dan di-resample (crop-first), lalu di-paste ke satu ImageTk.PhotoImage yang dipakai
+    ulang selama ukuran dan mode tampilannya sama. Zoom > 1 pada citra 100 MP tetap hanya
+    me-resample area seukuran frame.
+    center: titik tengah tampilan dalam koordinat citra relatif (0..1), diubah oleh pan();
+    karena relatif, preview pada citra proxy menampilkan area yang sama.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.center = (0.5, 0.5)
+        # Ukuran citra dan skala tampilan terakhir (untuk mengubah geseran mouse ke koordinat citra)
+        self._image_size = None
+        self._scale = 1.0
+        self._photo_mode = None
+
+    # Menampilkan img di frame berukuran frame_size dengan faktor zoom (1.0 = muat di frame).
+    # pyramid: ImagePyramid dari img (opsional); area dibaca dari level terkecil yang masih
+    # minimal seukuran tampilan, bukan dari resolusi penuh.
+    def render(self, img, frame_size, zoom=1.0, resample=Image.LANCZOS, pyramid=None):
+        self._image_size = img.size
+
+        frame_w, frame_h = frame_size
+        img_w, img_h = img.size
+        scale = min(frame_w / img_w, frame_h / img_h) * FIT_MARGIN * zoom
+        self._scale = scale
+
+        # Ukuran area tampilan (piksel layar) dan box sumber yang terlihat di area itu
+        view_w = max(1, min(int(img_w * scale), frame_w))
+        view_h = max(1, min(int(img_h * scale), frame_h))
+        box_w, box_h = min(img_w, view_w / scale), min(img_h, view_h / scale)
+        left = _clamp(self.center[0] * img_w - box_w / 2, 0, img_w - box_w)
+        top = _clamp(self.center[1] * img_h - box_h / 2, 0, img_h - box_h)
+        self.center = ((left + box_w / 2) / img_w, (top + box_h / 2) / img_h)
+
+        if pyramid is not None:
+            img, level_scale = pyramid.for_scale(scale)
+            img_w, img_h = img.size
+            left, top, box_w, box_h = (v * level_scale for v in (left, top, box_w, box_h))
+
+        # Crop dulu (dengan margin untuk kernel resample) agar konversi internal PIL, mis. RGBA
+        # premultiplied, tidak dikerjakan pada seluruh citra
+        crop_left = max(0, math.floor(left) - _CROP_MARGIN)
+        crop_top = max(0, math.floor(top) - _CROP_MARGIN)
+        crop_right = min(img_w, math.ceil(left + box_w) + _CROP_MARGIN)
+        crop_bottom = min(img_h, math.ceil(top + box_h) + _CROP_MARGIN)
+        if (crop_right - crop_left) * (crop_bottom - crop_top) < img_w * img_h:
+            img = img.crop((crop_left, crop_top, crop_right, crop_bottom))
+            left, top = left - crop_left, top - crop_top
+        box = (left, top, min(left + box_w, img.width), min(top + box_h, img.height))
+
+        self._show(resize(img, (view_w, view_h), resample, box=box))
+
+    # Menggeser tampilan sejauh (dx, dy) piksel layar (posisi dibatasi saat render berikutnya)
+    def pan(self, dx, dy):
+        if self._image_size is None:
+            return
+        img_w, img_h = self._image_size
+        self.center = (
+            self.center[0] - dx / (self._scale * img_w),
+            self.center[1] - dy / (self._scale * img_h),
+        )
+
+    # Kembali ke tengah citra
+    def reset(self):
+        self.center = (0.5, 0.5)
+
+    # PhotoImage dibuat ulang hanya jika ukuran atau mode dasarnya berubah; selain itu di-paste
+    def _show(self, img):
+        mode = Image.getmodebase(img.mode)
+        if (
+            self.photo is None
+            or (self.photo.width(), self.photo.height()) != img.size
+            or self._photo_mode != mode
+        ):
+            self.photo = ImageTk.PhotoImage(img)
+            self._photo_mode = mode
+        else:
+            self.photo.paste(img)
+        self.label.config(image=self.photo, text="")
+
+
+def _clamp(value, low, high):
+    return max(low, min(value, high))